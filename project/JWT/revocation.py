@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from typing import Iterable, Optional
+
+import jwt
+from redis.exceptions import RedisError
+
+from config import settings
+from metrics import REDIS_CALL_DURATION
+from redis_client import redis
+from .token_cache import token_cache, token_key
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY_PREFIX = "revoked:"
+REVOCATION_CHANNEL = "jwt:revoked"
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+def _new_filter() -> BloomFilter:
+    return BloomFilter(settings.JWT_BLOOM_CAPACITY, settings.JWT_BLOOM_ERROR_RATE)
+
+
+revoked_filter = _new_filter()
+# Фильтр можно использовать для отрицательных ответов, только пока он синхронизирован с Redis:
+# до первой загрузки и после обрыва подписки все проверки идут в Redis.
+filter_ready = False
+_added_during_rebuild: Optional[list] = None
+
+
+def _remember(jti: str) -> None:
+    revoked_filter.add(jti)
+    if _added_during_rebuild is not None:
+        _added_during_rebuild.append(jti)
+
+
+def _revocation_entry(token: str) -> Optional[tuple]:
+    # Подпись не проверяем: отзыв чужого или поддельного jti ничего не открывает.
+    try:
+        payload = jwt.decode(token, options={"verify_signature": False, "verify_exp": False})
+    except jwt.PyJWTError:
+        return None
+    jti, exp = payload.get("jti"), payload.get("exp")
+    if not jti or not exp:
+        return None
+    return jti, max(1, int(exp - time.time()) + 1)
+
+
+async def revoke_tokens(*tokens: str) -> None:
+    """Отзывает токены одним пайплайном: ключи revoked:{jti} с TTL до exp и сообщения в pub/sub."""
+    async with redis.pipeline(transaction=True) as pipe:
+        for token in tokens:
+            token_cache.discard(token_key(token))
+            entry = _revocation_entry(token)
+            if entry is None:
+                continue
+            jti, ttl = entry
+            _remember(jti)
+            pipe.set(f"{REVOKED_KEY_PREFIX}{jti}", "1", ex=ttl)
+            pipe.publish(REVOCATION_CHANNEL, f"{jti} {token_key(token)}")
+        with REDIS_CALL_DURATION.labels("revoke_tokens").time():
+            await pipe.execute()
+
+
+async def is_revoked(jti: str) -> bool:
+    if filter_ready and jti not in revoked_filter:
+        return False
+    with REDIS_CALL_DURATION.labels("is_revoked").time():
+        return bool(await redis.exists(f"{REVOKED_KEY_PREFIX}{jti}"))
+
+
+async def rebuild_revoked_filter() -> None:
+    """Перестраивает фильтр по ключам в Redis, заодно выбрасывая истёкшие jti."""
+    global revoked_filter, filter_ready, _added_during_rebuild
+    _added_during_rebuild = []
+    try:
+        rebuilt = _new_filter()
+        with REDIS_CALL_DURATION.labels("rebuild_revoked_filter").time():
+            async for key in redis.scan_iter(match=f"{REVOKED_KEY_PREFIX}*", count=1000):
+                rebuilt.add(key[len(REVOKED_KEY_PREFIX):])
+        for jti in _added_during_rebuild:
+            rebuilt.add(jti)
+        revoked_filter = rebuilt
+        filter_ready = True
+    finally:
+        _added_during_rebuild = None
+
+
+async def rebuild_revoked_filter_periodically() -> None:
+    while True:
+        await asyncio.sleep(settings.JWT_BLOOM_REBUILD_SECONDS)
+        if not filter_ready:
+            continue
+        try:
+            await rebuild_revoked_filter()
+        except RedisError:
+            logger.warning("Revoked token filter rebuild failed", exc_info=True)
+
+
+async def listen_for_revocations() -> None:
+    """Фоновая задача: держит фильтр и кэш проверенных токенов в согласии с отзывами из других воркеров."""
+    global filter_ready
+    while True:
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(REVOCATION_CHANNEL)
+                # Пока подписки не было, сообщения могли потеряться.
+                token_cache.clear()
+                await rebuild_revoked_filter()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    jti, _, digest = message["data"].partition(" ")
+                    _remember(jti)
+                    token_cache.discard(digest)
+        except asyncio.CancelledError:
+            raise
+        except RedisError:
+            logger.warning("JWT revocation listener disconnected, retrying", exc_info=True)
+            filter_ready = False
+            token_cache.clear()
+            await asyncio.sleep(1)
@@ -1,23 +1,27 @@
 # users_router.py
 from fastapi import APIRouter, Response, HTTPException, status, Depends, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import select
-from database import async_session_factory
-import bcrypt
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import SessionDep, run_write
 import jwt
 import pytz
+import uuid
 from config import settings
 from datetime import datetime, timedelta
-from aioredis import from_url
 from fastapi.responses import JSONResponse
 from Users.schemas import UsersAdd
 from Users.models import Users
+from Users.router import get_user
+from Users.cache import user_cache
+from Users.passwords import hash_password, verify_password, needs_rehash
+from .token_cache import token_cache
+from .revocation import revoke_tokens, is_revoked
+from ratelimit import limit_route
 
 
 router = APIRouter()
 
-redis = from_url(settings.BROKER_URL, decode_responses=True)
-
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_DAYS = settings.ACCESS_TOKEN_EXPIRE_DAYS
@@ -26,16 +30,19 @@ REFRESH_TOKEN_EXPIRE_DAYS = settings.REFRESH_TOKEN_EXPIRE_DAYS
 http_bearer = HTTPBearer()
 
 
-async def get_user(username: str):
-    async with async_session_factory() as session:
-        stmt = select(Users).where(Users.username == username)
-        result = await session.execute(stmt)
-        return result.scalars().first()
+async def rehash_password(user_id: int, password: str):
+    """Перехеширует пароль с текущим BCRYPT_ROUNDS после успешного логина."""
+    hashed_password = await hash_password(password)
+
+    async def write(session: AsyncSession):
+        await session.execute(update(Users).where(Users.id == user_id).values(hashed_password=hashed_password))
+
+    await run_write(write)
+    user_cache.invalidate(user_id=user_id)
 
 
 async def add_tokens_to_blacklist(access_token: str, refresh_token: str):
-    await redis.setex(f"blacklist:{refresh_token}", timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS), "1")
-    await redis.setex(f"blacklist:{access_token}", timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS), "1")
+    await revoke_tokens(access_token, refresh_token)
 
 
 async def check_access_token(creds):
@@ -47,26 +54,33 @@ async def check_access_token(creds):
             detail="Access token not found in authorization header"
         )
 
-    blacklist_token = await redis.get(f"blacklist:{access_token}")
-    if blacklist_token:
+    if settings.JWT_CACHE_ENABLED:
+        payload = token_cache.get(access_token)
+        if payload is not None:
+            return payload
+
+    generation = token_cache.generation
+    payload = await verify_token(access_token)
+    if await is_revoked(payload["jti"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Access token is blacklisted"
         )
 
-    payload = await verify_token(access_token)
     if not payload["username"] or not payload['id'] or not payload['exp']:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token does not belong to the correct user"
         )
 
+    if settings.JWT_CACHE_ENABLED:
+        token_cache.put(access_token, payload, generation)
     return payload
 
 
 async def verify_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["exp", "jti"]})
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -85,7 +99,7 @@ async def verify_token(token: str):
 async def create_access_token(data: dict, expires_delta: timedelta = timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS)):
     to_encode = data.copy()
     expire = datetime.now(pytz.UTC) + expires_delta
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -93,14 +107,14 @@ async def create_access_token(data: dict, expires_delta: timedelta = timedelta(d
 async def create_refresh_token(data: dict, expires_delta: timedelta = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)):
     to_encode = data.copy()
     expire = datetime.now(pytz.UTC) + expires_delta
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-@router.post("/token", summary='Получение токена')
-async def login_for_access_token(user: UsersAdd, response: Response):
-    user_data = await get_user(user.username)
+@router.post("/token", summary='Получение токена', dependencies=[Depends(limit_route("token"))])
+async def login_for_access_token(user: UsersAdd, response: Response, db: SessionDep):
+    user_data = await get_user(db, user.username)
 
     if user_data is None:
         raise HTTPException(
@@ -108,12 +122,15 @@ async def login_for_access_token(user: UsersAdd, response: Response):
             detail="Нет пользователя с такими данными",
             headers={"WWW-Authenticate": "Bearer"})
 
-    if not bcrypt.checkpw(user.password.encode('utf-8'), user_data.hashed_password.encode('utf-8')):
+    if not await verify_password(user.password, user_data.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неправильный логин или пароль",
             headers={"WWW-Authenticate": "Bearer"})
 
+    if needs_rehash(user_data.hashed_password):
+        await rehash_password(user_data.id, user.password)
+
     user_info = {
         "username": user_data.username,
         "id": user_data.id
@@ -142,8 +159,7 @@ async def refresh_tokens(request: Request, response: Response, access_token: HTT
             detail="Refresh token not found in cookies"
         )
     payload = await verify_token(refresh_token)
-    refresh_token_blacklist = await redis.get(f"blacklist:{refresh_token}")
-    if refresh_token_blacklist or not await verify_token(refresh_token):
+    if await is_revoked(payload["jti"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or blacklisted refresh token"
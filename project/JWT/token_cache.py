@@ -0,0 +1,59 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config import settings
+
+
+def token_key(token: str) -> str:
+    # В кэше и в pub/sub храним дайджест, а не сам токен.
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class VerifiedTokenCache:
+    """LRU уже проверенных токенов; запись живёт до exp токена, но не дольше JWT_CACHE_TTL_SECONDS."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        # Растёт при каждом отзыве. Проверка токена в Redis занимает await, и отзыв, пришедший
+        # за это время, уже обработан: put с поколением до отзыва ничего не кладёт.
+        self.generation = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        key = token_key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def put(self, token: str, payload: dict, generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+        expires_at = min(float(payload["exp"]), time.time() + self.ttl_seconds)
+        key = token_key(token)
+        self._entries[key] = (expires_at, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        self.generation += 1
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+token_cache = VerifiedTokenCache(settings.JWT_CACHE_MAX_ENTRIES, settings.JWT_CACHE_TTL_SECONDS)
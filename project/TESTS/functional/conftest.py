@@ -0,0 +1,168 @@
+"""Окружение для прогона сценариев TESTS/specs без Docker: main.app через ASGI, SQLite во временном файле и fakeredis.
+
+Тесты с базой выполняются на обоих бэкендах: SQLite и Postgres. Для Postgres берётся TEST_POSTGRES_URL
+(postgresql+asyncpg://..., база очищается), а без него во временном каталоге поднимается свой кластер,
+если найдены initdb и pg_ctl (POSTGRES_BIN_DIR, PATH, pg_config --bindir или /usr/lib/postgresql/*/bin);
+иначе эти тесты пропускаются.
+
+Каждый воркер pytest-xdist - отдельный процесс со своей базой и своим fakeredis, поэтому
+тесты параллелятся без общих данных. Внутри воркера таблицы очищаются перед каждым тестом.
+"""
+import glob
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# Настройки и движки создаются при импорте приложения, поэтому окружение - до любых импортов из project.
+# In-memory SQLite не подходит: писателю и читателям нужны отдельные соединения к одной базе.
+os.environ["SQL_DATABASE"] = os.path.join(tempfile.mkdtemp(prefix="tasks-tests-"), "tasks.db")
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ.setdefault("BROKER_URL", "redis://localhost:6379/0")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_DAYS", "1")
+os.environ.setdefault("REFRESH_TOKEN_EXPIRE_DAYS", "2")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+import fakeredis
+import httpx
+import pytest
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import redis_client
+
+# Модули делают `from redis_client import redis`, подмена должна случиться до импорта main.
+redis_client.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+import database
+import main
+import Tasks.export
+from config import settings
+from JWT.token_cache import token_cache
+from Users.cache import user_cache
+from Users.models import Base
+
+
+def find_postgres_bindir() -> Optional[str]:
+    candidates = [os.environ.get("POSTGRES_BIN_DIR")]
+    if shutil.which("pg_ctl"):
+        candidates.append(os.path.dirname(shutil.which("pg_ctl")))
+    if shutil.which("pg_config"):
+        result = subprocess.run(["pg_config", "--bindir"], capture_output=True, text=True)
+        candidates.append(result.stdout.strip())
+    candidates += sorted(glob.glob("/usr/lib/postgresql/*/bin"), reverse=True)
+    for bindir in candidates:
+        if bindir and all(os.path.exists(os.path.join(bindir, name)) for name in ("initdb", "pg_ctl")):
+            return bindir
+    return None
+
+
+@contextmanager
+def postgres_url() -> Iterator[str]:
+    if os.environ.get("TEST_POSTGRES_URL"):
+        yield os.environ["TEST_POSTGRES_URL"]
+        return
+    bindir = find_postgres_bindir()
+    if bindir is None:
+        pytest.skip("PostgreSQL binaries (initdb, pg_ctl) not found")
+    if os.geteuid() == 0:
+        pytest.skip("PostgreSQL refuses to run as root, set TEST_POSTGRES_URL")
+    with postgres_cluster(bindir) as url:
+        yield url
+
+
+@contextmanager
+def postgres_cluster(bindir: str) -> Iterator[str]:
+    """Временный кластер, доступный только через unix-сокет в его каталоге."""
+    directory = tempfile.mkdtemp(prefix="tasks-tests-pg-")
+    data = os.path.join(directory, "data")
+    subprocess.run(
+        [os.path.join(bindir, "initdb"), "-D", data, "-U", "postgres", "--auth=trust", "-E", "UTF8", "--no-sync"],
+        check=True, capture_output=True,
+    )
+    options = f"-c listen_addresses='' -c unix_socket_directories='{directory}' -c fsync=off"
+    subprocess.run(
+        [os.path.join(bindir, "pg_ctl"), "-D", data, "-o", options, "-l", os.path.join(directory, "log"), "-w", "start"],
+        check=True, capture_output=True,
+    )
+    try:
+        yield URL.create(
+            "postgresql+asyncpg", username="postgres", database="postgres", query={"host": directory},
+        ).render_as_string(hide_password=False)
+    finally:
+        subprocess.run([os.path.join(bindir, "pg_ctl"), "-D", data, "-m", "immediate", "stop"], capture_output=True)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture(scope="session", params=["sqlite", "postgresql"])
+async def backend(request):
+    """Бэкенд базы. Для Postgres движки модуля database подменяются на движок временного кластера."""
+    if request.param == "sqlite":
+        yield "sqlite"
+        return
+    with postgres_url() as url, pytest.MonkeyPatch.context() as patch:
+        engine = database.build_async_engine(url)
+        session_factory = async_sessionmaker(engine)
+        patch.setattr(settings, "DB_BACKEND", "postgresql")
+        patch.setattr(database, "serialized_writer", False)
+        patch.setattr(database, "async_engine", engine)
+        patch.setattr(database, "read_engine", engine)
+        patch.setattr(database, "async_session_factory", session_factory)
+        patch.setattr(database, "read_session_factory", session_factory)
+        patch.setattr(Tasks.export, "read_session_factory", session_factory)
+        yield "postgresql"
+        await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+async def app(backend):
+    # Схема создаётся до lifespan: фоновые задачи приложения сразу обращаются к таблицам.
+    async with database.async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    async with main.app.router.lifespan_context(main.app):
+        yield main.app
+
+
+@pytest.fixture
+async def clean_state(app):
+    """Пустые таблицы, пустой Redis и пустые кэши процесса.
+
+    Таблицы очищаются DELETE, а не пересоздаются: DROP в Postgres берёт эксклюзивную блокировку
+    и может попасть во взаимоблокировку с фоновыми задачами приложения.
+    """
+    async def clear(session):
+        for table in reversed(Base.metadata.sorted_tables):
+            await session.execute(table.delete())
+
+    await database.run_write(clear)
+    await redis_client.redis.flushall()
+    token_cache.clear()
+    user_cache.clear()
+
+
+@pytest.fixture
+async def client(clean_state, app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def create_task(client, title: str = "task", **fields) -> dict:
+    """POST /api/tasks/ с проверкой ответа; общий шаг для тестов задач."""
+    response = await client.post("/api/tasks/", json={"title": title, **fields})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def register(client, user: dict) -> dict:
+    response = await client.post("/api/users/register", json=user)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,158 @@
+"""Асинхронные реализации шагов из TESTS/specs, те же проверки, что в step_impl/step_impl.py.
+
+Шаг сопоставляется со строкой спецификации так же, как в Gauge: параметры в кавычках
+заменяются плейсхолдерами, остальной текст должен совпасть.
+"""
+import re
+from typing import Awaitable, Callable, Dict
+
+STEPS: Dict[str, Callable[..., Awaitable[None]]] = {}
+
+
+def step(text: str):
+    def register(fn):
+        STEPS[re.sub(r"<[^>]+>", "<>", text)] = fn
+        return fn
+    return register
+
+
+def match_step(line: str):
+    """Строка спецификации -> (реализация шага, аргументы)."""
+    args = re.findall(r'"([^"]*)"', line)
+    key = re.sub(r'"[^"]*"', "<>", line)
+    if key not in STEPS:
+        raise LookupError(f"Шаг не реализован: {line}")
+    return STEPS[key], args
+
+
+def response_json(scenario: dict):
+    try:
+        return scenario["response"].json()
+    except ValueError:
+        assert False, "Ответ не является валидным JSON"
+
+
+@step("Очистить базу данных")
+async def clear(client, scenario):
+    # Фикстура client и так даёт каждому тесту пустую базу.
+    pass
+
+
+@step("Создать задачу с title <title>, description <description> и статусом <status>")
+async def create_task_with_data(client, scenario, title, description, status):
+    response = await client.post("/api/tasks/", json={"title": title, "description": description, "status": status})
+    scenario["response"] = response
+    if response.status_code == 200:
+        scenario["created_task"] = response.json()
+
+
+@step("Создать тестовую задачу")
+async def create_test_task(client, scenario):
+    await create_task_with_data(client, scenario, "Test Task", "Test Description", "CREATED")
+
+
+@step("Проверить что статус ответа равен <status_code>")
+async def check_status_code(client, scenario, status_code):
+    response = scenario["response"]
+    assert response.status_code == int(status_code), f"Ожидался статус {status_code}, получен {response.status_code}"
+
+
+@step("Проверить что в ответе есть поле <field>")
+async def verify_field_exists(client, scenario, field):
+    assert field in response_json(scenario), f"Поле '{field}' не найдено в ответе"
+
+
+@step("Проверить что title равен <expected_title>")
+async def verify_title_equals(client, scenario, expected_title):
+    title = response_json(scenario)["title"]
+    assert title == expected_title, f"Ожидался title '{expected_title}', получен '{title}'"
+
+
+@step("Проверить что status равен <expected_status>")
+async def verify_status_equals(client, scenario, expected_status):
+    status = response_json(scenario)["status"]
+    assert status == expected_status, f"Ожидался status '{expected_status}', получен '{status}'"
+
+
+async def create_tasks(client, tasks):
+    for task_data in tasks:
+        response = await client.post("/api/tasks/", json=task_data)
+        assert response.status_code == 200, f"Не удалось создать задачу: {response.text}"
+
+
+@step("Создать 3 тестовые задачи")
+async def create_three_test_tasks(client, scenario):
+    await create_tasks(client, [
+        {"title": "Task 1", "description": "Desc 1", "status": "CREATED"},
+        {"title": "Task 2", "description": "Desc 2", "status": "IN_PROGRESS"},
+        {"title": "Task 3", "description": "Desc 3", "status": "COMPLETED"},
+    ])
+
+
+@step("Создать задачи: 2 CREATED, 1 COMPLETED")
+async def create_tasks_with_statuses(client, scenario):
+    await create_tasks(client, [
+        {"title": "Created 1", "description": "Desc", "status": "CREATED"},
+        {"title": "Created 2", "description": "Desc", "status": "CREATED"},
+        {"title": "Completed 1", "description": "Desc", "status": "COMPLETED"},
+    ])
+
+
+@step("Перейти по URL <url>")
+async def go_to_url(client, scenario, url):
+    scenario["response"] = await client.get(url.replace("<uuid>", scenario.get("task_uuid", "")))
+
+
+@step("Проверить что в ответе <count> задачи")
+async def verify_response_contains_n_tasks(client, scenario, count):
+    tasks = response_json(scenario)
+    assert len(tasks) == int(count), f"Ожидалось {count} задач, получено {len(tasks)}"
+
+
+@step("Проверить что у каждой задачи есть <field1> и <field2>")
+async def verify_all_tasks_have_fields(client, scenario, field1, field2):
+    for task in response_json(scenario):
+        assert field1 in task, f"Задача {task} не содержит поле '{field1}'"
+        assert field2 in task, f"Задача {task} не содержит поле '{field2}'"
+
+
+@step("Сохранить UUID созданной задачи")
+async def save_created_task_uuid(client, scenario):
+    scenario["task_uuid"] = response_json(scenario)["uuid"]
+
+
+@step("Проверить что uuid совпадает с сохраненным")
+async def verify_uuid_matches_saved(client, scenario):
+    saved_uuid = scenario.get("task_uuid")
+    task_uuid = response_json(scenario)["uuid"]
+    assert saved_uuid, "Сохраненный UUID не найден"
+    assert task_uuid == saved_uuid, f"Ожидался UUID '{saved_uuid}', получен '{task_uuid}'"
+
+
+@step("Обновить задачу с новыми данными")
+async def update_task_with_new_data(client, scenario):
+    scenario["response"] = await client.put(f"/api/tasks/{scenario['task_uuid']}", json={
+        "title": "Updated Title",
+        "description": "Updated Description",
+        "status": "IN_PROGRESS",
+    })
+
+
+@step("Проверить что title обновился")
+async def verify_title_updated(client, scenario):
+    await verify_title_equals(client, scenario, "Updated Title")
+
+
+@step("Проверить что status обновился")
+async def verify_status_updated(client, scenario):
+    await verify_status_equals(client, scenario, "IN_PROGRESS")
+
+
+@step("Удалить задачу по UUID")
+async def delete_task_by_uuid(client, scenario):
+    scenario["response"] = await client.delete(f"/api/tasks/{scenario['task_uuid']}")
+
+
+@step("Попытаться получить удаленную задачу")
+async def try_get_deleted_task(client, scenario):
+    scenario["response"] = await client.get(f"/api/tasks/{scenario['task_uuid']}")
@@ -0,0 +1,77 @@
+"""Bulk-ручки: результат по каждому элементу, предел BULK_MAX_ITEMS, версии и счётчики."""
+from Tasks.schemas import BULK_MAX_ITEMS
+
+
+async def create_bulk(client, *titles: str) -> list:
+    response = await client.post("/api/tasks/bulk", json=[{"title": title} for title in titles])
+    assert response.status_code == 200, response.text
+    return [item["uuid"] for item in response.json()]
+
+
+async def get(client, task_id: str) -> dict:
+    return (await client.get(f"/api/tasks/{task_id}")).json()
+
+
+async def stats(client) -> dict:
+    return (await client.get("/api/tasks/stats")).json()
+
+
+async def test_bulk_update_reports_each_item_and_bumps_only_updated_rows(client):
+    first, second = await create_bulk(client, "a", "b")
+
+    response = await client.put("/api/tasks/bulk", json=[
+        {"uuid": first, "status": "COMPLETED"},
+        {"uuid": "missing", "title": "x"},
+        {"uuid": second},
+    ])
+
+    assert response.status_code == 200, response.text
+    assert response.json() == [
+        {"index": 0, "uuid": first, "result": "updated"},
+        {"index": 1, "uuid": "missing", "result": "not_found"},
+        {"index": 2, "uuid": second, "result": "updated"},
+    ]
+    assert (await get(client, first))["version"] == 2
+    # Элемент без полей ничего не меняет.
+    assert (await get(client, second))["version"] == 1
+    assert await stats(client) == {"CREATED": 1, "IN_PROGRESS": 0, "COMPLETED": 1, "total": 2}
+
+
+async def test_null_for_required_field_is_rejected_before_any_write(client):
+    [task] = await create_bulk(client, "a")
+
+    for field in ("title", "status"):
+        response = await client.put("/api/tasks/bulk", json=[
+            {"uuid": task, "description": "ok"},
+            {"uuid": task, field: None},
+        ])
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", 1, field]
+
+    single = await client.put(f"/api/tasks/{task}", json={"title": None})
+    assert single.status_code == 422
+    # Обнулять можно только description.
+    cleared = await client.patch(f"/api/tasks/{task}", json={"description": None})
+    assert cleared.status_code == 200
+    assert (await get(client, task)) == {**cleared.json(), "version": 2}
+
+
+async def test_bulk_delete_reports_each_item_and_updates_counters(client):
+    first, second = await create_bulk(client, "a", "b")
+
+    response = await client.request("DELETE", "/api/tasks/bulk", json=[first, "missing", first])
+
+    assert [item["result"] for item in response.json()] == ["deleted", "not_found", "deleted"]
+    assert (await client.get(f"/api/tasks/{first}")).status_code == 404
+    assert (await get(client, second))["version"] == 1
+    assert await stats(client) == {"CREATED": 1, "IN_PROGRESS": 0, "COMPLETED": 0, "total": 1}
+
+
+async def test_bulk_size_is_limited(client):
+    too_many = [{"title": "t"}] * (BULK_MAX_ITEMS + 1)
+
+    assert (await client.post("/api/tasks/bulk", json=too_many)).status_code == 422
+    assert (await client.put("/api/tasks/bulk", json=[{"uuid": "x"}] * (BULK_MAX_ITEMS + 1))).status_code == 422
+    assert (await client.request("DELETE", "/api/tasks/bulk", json=["x"] * (BULK_MAX_ITEMS + 1))).status_code == 422
+    assert (await client.post("/api/tasks/bulk", json=[])).status_code == 422
+    assert (await stats(client))["total"] == 0
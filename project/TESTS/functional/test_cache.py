@@ -0,0 +1,71 @@
+"""Кэш GET /api/tasks/{task_id}: попадания, промахи, инвалидация и защита от устаревших записей."""
+import json
+
+from Tasks import cache
+from conftest import create_task
+
+
+async def test_second_read_is_served_from_cache(client):
+    task = await create_task(client)
+    before = cache.cache_stats()
+
+    first = await client.get(f"/api/tasks/{task['uuid']}")
+    second = await client.get(f"/api/tasks/{task['uuid']}")
+
+    assert first.json() == second.json() == task
+    after = cache.cache_stats()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+
+async def test_missing_task_is_not_cached(client):
+    assert (await client.get("/api/tasks/missing")).status_code == 404
+    payload, _ = await cache.get_cached_task("missing")
+    assert payload is None
+
+
+async def test_write_invalidates_cached_task(client):
+    task = await create_task(client)
+    await client.get(f"/api/tasks/{task['uuid']}")
+
+    response = await client.patch(f"/api/tasks/{task['uuid']}", json={"title": "renamed"})
+    assert response.status_code == 200, response.text
+
+    payload, _ = await cache.get_cached_task(task["uuid"])
+    assert payload is None
+    fresh = (await client.get(f"/api/tasks/{task['uuid']}")).json()
+    assert fresh["title"] == "renamed"
+    payload, _ = await cache.get_cached_task(task["uuid"])
+    assert json.loads(payload)["title"] == "renamed"
+
+
+async def test_read_started_before_write_does_not_cache_stale_task(client):
+    task = await create_task(client)
+    # Чтение прочитало эпоху и старую версию из базы, затем задачу изменили.
+    _, epoch = await cache.get_cached_task(task["uuid"])
+    stale = json.dumps(task)
+    await cache.invalidate_tasks({task["uuid"]: task["version"] + 1})
+    skipped = cache.cache_stats()["stale_writes_skipped"]
+
+    await cache.cache_task(task["uuid"], stale, task["version"], epoch)
+
+    assert cache.cache_stats()["stale_writes_skipped"] == skipped + 1
+    assert (await cache.get_cached_task(task["uuid"]))[0] is None
+    # Версия после изменения кладётся поверх отметки, а более старая - нет и поверх записи.
+    await cache.cache_task(task["uuid"], json.dumps({**task, "version": task["version"] + 1}), task["version"] + 1, epoch)
+    await cache.cache_task(task["uuid"], stale, task["version"], epoch)
+    assert json.loads((await cache.get_cached_task(task["uuid"]))[0])["version"] == task["version"] + 1
+
+
+async def test_deleted_and_cleared_tasks_stay_out_of_cache(client):
+    task = await create_task(client)
+    _, epoch = await cache.get_cached_task(task["uuid"])
+    assert (await client.delete(f"/api/tasks/{task['uuid']}")).status_code == 200
+    await cache.cache_task(task["uuid"], json.dumps(task), task["version"], epoch)
+    assert (await cache.get_cached_task(task["uuid"]))[0] is None
+
+    other = await create_task(client)
+    _, epoch = await cache.get_cached_task(other["uuid"])
+    await cache.invalidate_all()
+    await cache.cache_task(other["uuid"], json.dumps(other), other["version"], epoch)
+    assert (await cache.get_cached_task(other["uuid"]))[0] is None
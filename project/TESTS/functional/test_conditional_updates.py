@@ -0,0 +1,119 @@
+"""Оптимистичная блокировка: 412 на устаревший If-Match и 409 на расхождение версии в теле PATCH."""
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+import database
+from Tasks.conditional import ETAG_HEADER
+from conftest import create_task
+
+
+async def current(client, task_id: str) -> dict:
+    return (await client.get(f"/api/tasks/{task_id}")).json()
+
+
+@pytest.mark.parametrize("method", ["put", "patch"])
+async def test_matching_if_match_updates_and_returns_new_etag(client, method):
+    task = await create_task(client, "draft")
+
+    response = await client.request(
+        method.upper(), f"/api/tasks/{task['uuid']}", json={"title": "final"}, headers={"If-Match": '"v1"'}
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["version"] == 2
+    assert response.headers[ETAG_HEADER] == '"v2"'
+
+
+@pytest.mark.parametrize("method", ["put", "patch"])
+async def test_stale_if_match_is_rejected_with_412(client, method):
+    task = await create_task(client, "draft")
+    await client.patch(f"/api/tasks/{task['uuid']}", json={"title": "someone else"})
+
+    response = await client.request(
+        method.upper(), f"/api/tasks/{task['uuid']}", json={"title": "mine"}, headers={"If-Match": '"v1"'}
+    )
+
+    assert response.status_code == 412
+    assert response.headers[ETAG_HEADER] == '"v2"'
+    assert await current(client, task["uuid"]) == {**task, "title": "someone else", "version": 2}
+
+
+async def test_patch_with_stale_version_is_rejected_with_409(client):
+    task = await create_task(client, "draft")
+    await client.put(f"/api/tasks/{task['uuid']}", json={"status": "IN_PROGRESS"})
+
+    response = await client.patch(f"/api/tasks/{task['uuid']}", json={"title": "mine", "version": 1})
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Version conflict: current version is 2"
+    assert response.headers[ETAG_HEADER] == '"v2"'
+    assert (await current(client, task["uuid"]))["title"] == "draft"
+
+    retried = await client.patch(f"/api/tasks/{task['uuid']}", json={"title": "mine", "version": 2})
+    assert retried.status_code == 200
+    assert retried.json()["version"] == 3
+
+
+async def test_missing_task_is_404_not_a_conflict(client):
+    response = await client.patch("/api/tasks/missing", json={"title": "x", "version": 1}, headers={"If-Match": '"v1"'})
+    assert response.status_code == 404
+
+
+async def test_empty_update_returns_current_task_without_writing(client):
+    task = await create_task(client, "draft")
+    url = f"/api/tasks/{task['uuid']}"
+    etag = (await client.get(url)).headers[ETAG_HEADER]
+    table_etag = (await client.get("/api/tasks/")).headers[ETAG_HEADER]
+
+    for response in (await client.put(url, json={}), await client.patch(url, json={"version": 1})):
+        assert response.status_code == 200
+        assert response.json() == task
+        assert response.headers[ETAG_HEADER] == etag
+
+    assert (await client.get(url, headers={"If-None-Match": etag})).status_code == 304
+    assert (await client.get("/api/tasks/", headers={"If-None-Match": table_etag})).status_code == 304
+    # Условия проверяются и без записи.
+    assert (await client.put(url, json={}, headers={"If-Match": '"v7"'})).status_code == 412
+    assert (await client.patch(url, json={"version": 7})).status_code == 409
+    assert (await client.put("/api/tasks/missing", json={})).status_code == 404
+
+
+async def test_status_change_reads_old_status_in_the_update_itself(client):
+    task = await create_task(client, "draft")
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(" ".join(statement.split()))
+
+    engine = database.async_engine.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = await client.patch(f"/api/tasks/{task['uuid']}", json={"status": "COMPLETED"})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    assert not [statement for statement in statements if statement.startswith("SELECT")]
+    [update_statement] = [statement for statement in statements if "UPDATE tasks" in statement]
+    assert update_statement.startswith("WITH old_task AS MATERIALIZED")
+    stats = (await client.get("/api/tasks/stats")).json()
+    assert stats == {"CREATED": 0, "IN_PROGRESS": 0, "COMPLETED": 1, "total": 1}
+
+
+async def test_concurrent_status_changes_keep_counters_exact(client):
+    tasks = [await create_task(client, "draft") for _ in range(4)]
+    statuses = ["IN_PROGRESS", "COMPLETED", "CREATED"] * 3
+
+    await asyncio.gather(*(
+        client.patch(f"/api/tasks/{task['uuid']}", json={"status": status})
+        for task in tasks for status in statuses
+    ))
+
+    final = [(await client.get(f"/api/tasks/{task['uuid']}")).json()["status"] for task in tasks]
+    stats = (await client.get("/api/tasks/stats")).json()
+    assert stats["total"] == 4
+    assert {status: stats[status] for status in ("CREATED", "IN_PROGRESS", "COMPLETED")} == {
+        status: final.count(status) for status in ("CREATED", "IN_PROGRESS", "COMPLETED")
+    }
@@ -0,0 +1,119 @@
+"""Счётчики task_counters: версия таблицы, счётчики статусов, приращения в Postgres."""
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+import database
+from Tasks.counters import (
+    TABLE_VERSION, bump_counter, compact_counters, get_counter, get_status_counts, reconcile_status_counters,
+    set_counter, status_counter,
+)
+from Tasks.models import Task, TaskCounter, TaskCounterDelta, TaskStatus
+
+
+async def read(fn, *args):
+    async with database.read_session_factory() as session:
+        return await fn(session, *args)
+
+
+async def count_rows(session, model):
+    return (await session.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+async def actual_counts(session):
+    result = await session.execute(select(Task.status, func.count()).group_by(Task.status))
+    counts = {status.value: 0 for status in TaskStatus}
+    counts.update((status.value, count) for status, count in result.all())
+    return counts
+
+
+async def assert_counts(client, expected: dict):
+    assert await read(actual_counts) == expected
+    assert await read(get_status_counts) == expected
+    response = await client.get("/api/tasks/stats")
+    assert response.json() == {**expected, "total": sum(expected.values())}
+
+
+async def test_counter_value_includes_pending_deltas(clean_state, backend):
+    await database.run_write(lambda db: bump_counter(db, TABLE_VERSION))
+    await database.run_write(lambda db: bump_counter(db, TABLE_VERSION, 2))
+    assert await read(get_counter, TABLE_VERSION) == 3
+
+    await database.run_write(compact_counters)
+    assert await read(get_counter, TABLE_VERSION) == 3
+    assert await read(count_rows, TaskCounterDelta) == 0
+
+    await database.run_write(lambda db: set_counter(db, TABLE_VERSION, 10))
+    await database.run_write(lambda db: bump_counter(db, TABLE_VERSION))
+    assert await read(get_counter, TABLE_VERSION) == 11
+
+
+async def test_postgres_writers_append_deltas_instead_of_updating_one_row(clean_state, backend):
+    if backend != "postgresql":
+        pytest.skip("SQLite обновляет счётчики на месте через единственного писателя")
+    await database.run_write(lambda db: set_counter(db, TABLE_VERSION, 1))
+
+    # Две открытые транзакции увеличивают один счётчик: вторая не ждёт блокировку первой.
+    async with database.async_session_factory() as first, database.async_session_factory() as second:
+        await bump_counter(first, TABLE_VERSION)
+        await asyncio.wait_for(bump_counter(second, TABLE_VERSION), timeout=5)
+        await asyncio.wait_for(second.commit(), timeout=5)
+        await first.commit()
+
+    assert await read(get_counter, TABLE_VERSION) == 3
+    assert await read(count_rows, TaskCounterDelta) == 2
+    await database.run_write(compact_counters)
+    assert await read(count_rows, TaskCounterDelta) == 0
+    assert await read(count_rows, TaskCounter) == 1
+
+
+async def test_status_counts_follow_writes(client):
+    await client.post("/api/tasks/", json={"title": "a", "status": "CREATED"})
+    await client.post("/api/tasks/bulk", json=[{"title": "b", "status": "COMPLETED"}, {"title": "c"}])
+
+    assert await read(get_status_counts) == {"CREATED": 2, "IN_PROGRESS": 0, "COMPLETED": 1}
+    response = await client.get("/api/tasks/stats")
+    assert response.json() == {"CREATED": 2, "IN_PROGRESS": 0, "COMPLETED": 1, "total": 3}
+
+
+async def test_status_counts_follow_every_kind_of_write(client):
+    created = [(await client.post("/api/tasks/", json={"title": f"t{i}"})).json()["uuid"] for i in range(3)]
+    bulk = await client.post("/api/tasks/bulk", json=[
+        {"title": "b1", "status": "IN_PROGRESS"}, {"title": "b2", "status": "COMPLETED"}, {"title": "b3"},
+    ])
+    bulk_ids = [item["uuid"] for item in bulk.json()]
+    await assert_counts(client, {"CREATED": 4, "IN_PROGRESS": 1, "COMPLETED": 1})
+
+    await client.patch(f"/api/tasks/{created[0]}", json={"status": "COMPLETED"})
+    await client.put(f"/api/tasks/{created[1]}", json={"title": "same status"})
+    await assert_counts(client, {"CREATED": 3, "IN_PROGRESS": 1, "COMPLETED": 2})
+
+    # Неизвестная задача в пачке не должна сдвигать счётчики.
+    await client.put("/api/tasks/bulk", json=[
+        {"uuid": created[1], "status": "IN_PROGRESS"},
+        {"uuid": bulk_ids[0], "status": "IN_PROGRESS"},
+        {"uuid": "missing", "status": "COMPLETED"},
+    ])
+    await assert_counts(client, {"CREATED": 2, "IN_PROGRESS": 2, "COMPLETED": 2})
+
+    await client.delete(f"/api/tasks/{created[2]}")
+    await client.request("DELETE", "/api/tasks/bulk", json=[bulk_ids[1], "missing"])
+    await assert_counts(client, {"CREATED": 1, "IN_PROGRESS": 2, "COMPLETED": 1})
+
+    await client.delete("/api/tasks_delete_all", params={"status": "IN_PROGRESS"})
+    await assert_counts(client, {"CREATED": 1, "IN_PROGRESS": 0, "COMPLETED": 1})
+    await client.delete("/api/tasks_delete_all")
+    await assert_counts(client, {"CREATED": 0, "IN_PROGRESS": 0, "COMPLETED": 0})
+
+
+async def test_reconciliation_repairs_drift(client):
+    await client.post("/api/tasks/bulk", json=[{"title": "a"}, {"title": "b", "status": "COMPLETED"}])
+    await database.run_write(lambda db: set_counter(db, status_counter(TaskStatus.CREATED), 7))
+    await database.run_write(lambda db: bump_counter(db, status_counter(TaskStatus.COMPLETED), -1))
+
+    drift = await database.run_write(reconcile_status_counters)
+
+    assert drift == {"CREATED": -6, "COMPLETED": 1}
+    await assert_counts(client, {"CREATED": 1, "IN_PROGRESS": 0, "COMPLETED": 1})
+    assert await database.run_write(reconcile_status_counters) == {}
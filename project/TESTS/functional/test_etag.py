@@ -0,0 +1,54 @@
+"""ETag и If-None-Match: 304 для задачи и списка, новый ETag после записи."""
+from Tasks.conditional import ETAG_HEADER
+from conftest import create_task
+
+
+async def test_task_returns_304_for_matching_if_none_match(client):
+    task = await create_task(client)
+    url = f"/api/tasks/{task['uuid']}"
+    etag = (await client.get(url)).headers[ETAG_HEADER]
+
+    # Второй запрос отвечает из кэша задач, третий - со слабым ETag и списком кандидатов.
+    for header in (etag, f'"v0", W/{etag}'):
+        response = await client.get(url, headers={"If-None-Match": header})
+        assert response.status_code == 304
+        assert response.headers[ETAG_HEADER] == etag
+        assert response.content == b""
+
+    assert (await client.get(url, headers={"If-None-Match": '"v0"'})).status_code == 200
+
+
+async def test_task_etag_changes_after_write(client):
+    task = await create_task(client)
+    url = f"/api/tasks/{task['uuid']}"
+    etag = (await client.get(url)).headers[ETAG_HEADER]
+
+    await client.patch(url, json={"title": "renamed"})
+
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers[ETAG_HEADER] != etag
+    assert response.json()["title"] == "renamed"
+
+
+async def test_list_returns_304_until_any_task_changes(client):
+    first = await create_task(client, "a")
+    etag = (await client.get("/api/tasks/")).headers[ETAG_HEADER]
+
+    response = await client.get("/api/tasks/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers[ETAG_HEADER] == etag
+    # ETag зависит от параметров запроса.
+    filtered = await client.get("/api/tasks/?status=CREATED", headers={"If-None-Match": etag})
+    assert filtered.status_code == 200
+
+    for write in (
+        lambda: client.post("/api/tasks/", json={"title": "b"}),
+        lambda: client.patch(f"/api/tasks/{first['uuid']}", json={"status": "COMPLETED"}),
+        lambda: client.delete(f"/api/tasks/{first['uuid']}"),
+    ):
+        assert (await write()).status_code == 200
+        response = await client.get("/api/tasks/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers[ETAG_HEADER] != etag
+        etag = response.headers[ETAG_HEADER]
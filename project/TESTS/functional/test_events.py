@@ -0,0 +1,120 @@
+"""Лента событий: дочитывание после Last-Event-ID, поведение при недоступном Redis и содержимое событий."""
+import asyncio
+import json
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from Tasks import events
+from Tasks.events import EVENT_FIELD, EVENTS_STREAM_KEY, EventsUnavailable, iter_events
+from Tasks.router import stream_task_events_ws
+from redis_client import redis
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def close(self, code, reason=""):
+        self.closed = (code, reason)
+
+
+@pytest.fixture
+def redis_down(monkeypatch):
+    async def xrange(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(redis, "xrange", xrange)
+
+
+async def stream_ids():
+    return [event_id for event_id, _ in await redis.xrange(EVENTS_STREAM_KEY)]
+
+
+async def test_reconnect_replays_events_after_last_event_id(client):
+    for title in ("a", "b", "c"):
+        await client.post("/api/tasks/", json={"title": title})
+    first, second, third = await stream_ids()
+
+    stream = iter_events(first)
+    try:
+        replayed = [await asyncio.wait_for(stream.__anext__(), timeout=5) for _ in range(2)]
+    finally:
+        await stream.aclose()
+
+    assert [event_id for event_id, _ in replayed] == [second, third]
+    assert '"title": "c"' in replayed[1][1]
+    assert events.stats.subscribers == 0
+
+
+async def test_sse_stream_ends_when_history_is_unavailable(client, redis_down):
+    await client.post("/api/tasks/", json={"title": "a"})
+    errors = events.stats.replay_errors
+
+    response = await client.get("/api/tasks/stream", headers={"Last-Event-ID": "1-0"})
+
+    assert response.status_code == 200
+    assert response.text == "retry: 3000\n\n"
+    assert events.stats.replay_errors == errors + 1
+    assert events.stats.subscribers == 0
+
+
+async def test_websocket_closes_with_retry_code_when_history_is_unavailable(clean_state, redis_down):
+    websocket = FakeWebSocket()
+
+    await stream_task_events_ws(websocket, offset="1-0")
+
+    assert websocket.sent == []
+    assert websocket.closed == (1013, "Events unavailable")
+    assert events.stats.subscribers == 0
+
+
+async def test_iter_events_raises_instead_of_skipping_history(clean_state, redis_down):
+    with pytest.raises(EventsUnavailable):
+        async for _ in iter_events("1-0"):
+            pass
+
+
+async def test_stream_endpoints_are_off_when_events_are_disabled(client, monkeypatch):
+    monkeypatch.setattr(events.settings, "TASK_EVENTS_ENABLED", False)
+    websocket = FakeWebSocket()
+
+    response = await client.get("/api/tasks/stream")
+    await stream_task_events_ws(websocket)
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Task events are disabled"
+    assert websocket.closed == (1008, "Task events are disabled")
+    await client.post("/api/tasks/", json={"title": "a"})
+    assert await stream_ids() == []
+
+
+async def test_bulk_update_publishes_full_rows_like_single_update(client):
+    first = (await client.post("/api/tasks/", json={"title": "a", "description": "d"})).json()
+    second = (await client.post("/api/tasks/", json={"title": "b"})).json()
+    before = await stream_ids()
+
+    await client.put("/api/tasks/bulk", json=[
+        {"uuid": first["uuid"], "status": "COMPLETED"},
+        {"uuid": "missing", "title": "x"},
+        {"uuid": first["uuid"], "title": "a2"},
+    ])
+    single = (await client.patch(f"/api/tasks/{second['uuid']}", json={"status": "COMPLETED"})).json()
+
+    published = [
+        json.loads(fields[EVENT_FIELD]) for event_id, fields in await redis.xrange(EVENTS_STREAM_KEY)
+        if event_id not in before
+    ]
+    bulk_row = (await client.get(f"/api/tasks/{first['uuid']}")).json()
+    assert published == [
+        {"type": "updated", "data": bulk_row},
+        {"type": "updated", "data": single},
+    ]
+    assert bulk_row == {**first, "title": "a2", "status": "COMPLETED", "version": 3}
@@ -0,0 +1,92 @@
+"""GET /api/tasks/export: NDJSON и CSV потоком, заголовки, фильтр по статусу, строки совпадают с базой."""
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import select
+
+import database
+from Tasks import export, models
+
+TASKS = [
+    {"title": "Купить молоко", "description": "до завтрака"},
+    {"title": 'quote " and, comma', "description": "line\nbreak"},
+    {"title": "no description", "status": "COMPLETED"},
+    {"title": "in progress", "description": "", "status": "IN_PROGRESS"},
+]
+
+
+@pytest.fixture
+async def tasks(client):
+    response = await client.post("/api/tasks/bulk", json=TASKS)
+    assert response.status_code == 200, response.text
+
+
+async def db_rows(status=None) -> list:
+    stmt = select(models.Task.uuid, models.Task.title, models.Task.description, models.Task.status)
+    if status is not None:
+        stmt = stmt.where(models.Task.status == status)
+    async with database.read_session_factory() as session:
+        rows = (await session.execute(stmt.order_by(models.Task.uuid))).all()
+    return [
+        {"uuid": uuid, "title": title, "description": description, "status": status.value}
+        for uuid, title, description, status in rows
+    ]
+
+
+async def download(client, **params):
+    chunks = []
+    async with client.stream("GET", "/api/tasks/export", params=params) as response:
+        assert response.status_code == 200
+        async for chunk in response.aiter_text():
+            chunks.append(chunk)
+    return response, "".join(chunks)
+
+
+async def test_ndjson_export_streams_all_rows(client, tasks, monkeypatch):
+    # Маленькие партии: тело собирается из нескольких кусков курсора.
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 1)
+
+    response, body = await download(client)
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="tasks.ndjson"'
+    assert body.endswith("\n")
+    assert [json.loads(line) for line in body.splitlines()] == await db_rows()
+
+
+async def test_csv_export_streams_all_rows(client, tasks, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 1)
+
+    response, body = await download(client, format="csv")
+
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="tasks.csv"'
+    header, *rows = list(csv.reader(io.StringIO(body)))
+    assert tuple(header) == export.EXPORT_FIELDS
+    # CSV не различает NULL и пустую строку.
+    assert rows == [
+        [row["uuid"], row["title"], row["description"] or "", row["status"]] for row in await db_rows()
+    ]
+
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+async def test_export_filters_by_status(client, tasks, format):
+    _, body = await download(client, format=format, status="COMPLETED")
+
+    if format == "csv":
+        uuids = [row[0] for row in list(csv.reader(io.StringIO(body)))[1:]]
+    else:
+        uuids = [json.loads(line)["uuid"] for line in body.splitlines()]
+    assert uuids == [row["uuid"] for row in await db_rows(models.TaskStatus.COMPLETED)]
+    assert len(uuids) == 1
+
+
+async def test_export_of_empty_table_and_unknown_format(client):
+    _, ndjson = await download(client)
+    _, csv_body = await download(client, format="csv")
+
+    assert ndjson == ""
+    assert csv_body == ",".join(export.EXPORT_FIELDS) + "\r\n"
+    assert (await client.get("/api/tasks/export", params={"format": "xml"})).status_code == 422
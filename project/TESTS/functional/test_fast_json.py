@@ -0,0 +1,57 @@
+"""TASK_FAST_JSON: быстрый путь (кортежи + orjson) отдаёт те же байты, что и response_model."""
+import pytest
+
+from Tasks import cache
+from config import settings
+from conftest import create_task
+
+TASKS = [
+    {"title": "Купить молоко", "description": "до завтрака \"срочно\""},
+    {"title": "no description", "status": "COMPLETED"},
+    {"title": "emoji 🚀", "description": "", "status": "IN_PROGRESS"},
+]
+
+
+async def responses(client, fast: bool, monkeypatch) -> dict:
+    monkeypatch.setattr(settings, "TASK_FAST_JSON", fast)
+    # Задача читается из базы, а не из кэша, заполненного другим режимом.
+    await cache.invalidate_all()
+    urls = ["/api/tasks/", "/api/tasks/?limit=2", "/api/tasks/search?q=молоко"]
+    urls += [f"/api/tasks/{task['uuid']}" for task in (await client.get("/api/tasks/")).json()]
+    result = {}
+    for url in urls:
+        response = await client.get(url)
+        assert response.status_code == 200, response.text
+        result[url] = (response.content, response.headers["content-type"])
+    return result
+
+
+async def test_fast_json_matches_response_model_byte_for_byte(client, monkeypatch):
+    for task in TASKS:
+        await create_task(client, **task)
+
+    slow = await responses(client, False, monkeypatch)
+    fast = await responses(client, True, monkeypatch)
+
+    assert fast == slow
+    payloads = [content for content, _ in slow.values()]
+    # uuid - строка, status - значение enum, пустое описание и NULL различаются.
+    assert b'"status":"IN_PROGRESS"' in payloads[0]
+    assert b'"description":null' in payloads[0]
+    assert b'"description":""' in payloads[0]
+    assert "🚀".encode() in payloads[0]
+    assert "Купить молоко".encode() in slow["/api/tasks/search?q=молоко"][0]
+
+
+@pytest.mark.parametrize("fast", [False, True])
+async def test_cached_task_is_the_same_in_both_modes(client, monkeypatch, fast):
+    monkeypatch.setattr(settings, "TASK_FAST_JSON", fast)
+    task = await create_task(client, "a", status="COMPLETED")
+
+    first = await client.get(f"/api/tasks/{task['uuid']}")
+    cached = await client.get(f"/api/tasks/{task['uuid']}")
+
+    assert first.content == cached.content
+    assert first.json() == task == {
+        "title": "a", "description": None, "status": "COMPLETED", "uuid": task["uuid"], "version": 1,
+    }
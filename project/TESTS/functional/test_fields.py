@@ -0,0 +1,83 @@
+"""?fields=: проекция списка, задачи и поиска, 400 на неизвестные поля, проекция из кэша."""
+import pytest
+
+from Tasks import cache
+from Tasks.conditional import ETAG_HEADER
+from Tasks.pagination import NEXT_CURSOR_HEADER
+from conftest import create_task
+
+ENDPOINTS = [("/api/tasks/", {}), ("/api/tasks/missing", {}), ("/api/tasks/search", {"q": "milk"})]
+
+
+async def test_list_returns_only_requested_fields_in_task_order(client):
+    first = await create_task(client, "a", description="one")
+    second = await create_task(client, "b", status="COMPLETED")
+
+    response = await client.get("/api/tasks/", params={"fields": " status,uuid ,status"})
+
+    assert response.status_code == 200
+    assert [list(task) for task in response.json()] == [["status", "uuid"]] * 2
+    assert sorted(response.json(), key=lambda task: task["uuid"]) == sorted(
+        [{"status": task["status"], "uuid": task["uuid"]} for task in (first, second)], key=lambda task: task["uuid"]
+    )
+    assert ETAG_HEADER in response.headers
+
+
+async def test_list_pages_by_cursor_without_uuid_in_fields(client):
+    tasks = sorted([await create_task(client, title) for title in ("a", "b", "c")], key=lambda task: task["uuid"])
+
+    first = await client.get("/api/tasks/", params={"fields": "title", "limit": 2})
+    second = await client.get(
+        "/api/tasks/", params={"fields": "title", "limit": 2, "cursor": first.headers[NEXT_CURSOR_HEADER]}
+    )
+
+    assert first.json() + second.json() == [{"title": task["title"]} for task in tasks]
+    assert NEXT_CURSOR_HEADER not in second.headers
+
+
+async def test_task_projection_is_read_from_columns_and_not_cached(client):
+    task = await create_task(client, "a", description="one")
+
+    response = await client.get(f"/api/tasks/{task['uuid']}", params={"fields": "version,title"})
+
+    assert response.status_code == 200
+    assert response.json() == {"title": "a", "version": 1}
+    assert response.headers[ETAG_HEADER] == '"v1"'
+    # В кэш попадает только полное представление.
+    payload, _ = await cache.get_cached_task(task["uuid"])
+    assert payload is None
+
+
+async def test_task_projection_is_cut_from_cached_full_task(client):
+    task = await create_task(client, "a", description="one")
+    await client.get(f"/api/tasks/{task['uuid']}")
+    hits = cache.cache_stats()["hits"]
+
+    response = await client.get(f"/api/tasks/{task['uuid']}", params={"fields": "uuid,description"})
+
+    assert cache.cache_stats()["hits"] == hits + 1
+    assert response.json() == {"description": "one", "uuid": task["uuid"]}
+    assert response.headers[ETAG_HEADER] == '"v1"'
+
+
+async def test_search_returns_only_requested_fields(client):
+    task = await create_task(client, "Buy milk", description="before breakfast")
+    await create_task(client, "Call mom")
+
+    response = await client.get("/api/tasks/search", params={"q": "milk", "fields": "uuid"})
+
+    assert response.status_code == 200
+    assert response.json() == [{"uuid": task["uuid"]}]
+
+
+@pytest.mark.parametrize("url, params", ENDPOINTS)
+@pytest.mark.parametrize("fields, detail", [
+    ("uuid,owner,secret", "Unknown fields: owner, secret"),
+    ("", "No fields requested"),
+    (" , ", "No fields requested"),
+])
+async def test_unknown_or_empty_fields_are_rejected_with_400(client, url, params, fields, detail):
+    response = await client.get(url, params={**params, "fields": fields})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
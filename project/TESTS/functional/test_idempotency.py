@@ -0,0 +1,84 @@
+"""Idempotency-Key: повтор ответа, 422 на другое тело, склейка одновременных запросов."""
+import asyncio
+
+import pytest
+
+from Tasks import router as task_router
+from Tasks.idempotency import REPLAYED_HEADER, _in_flight
+
+
+def key(value: str) -> dict:
+    return {"Idempotency-Key": value}
+
+
+async def task_count(client) -> int:
+    return len((await client.get("/api/tasks/")).json())
+
+
+@pytest.fixture
+def slow_create(monkeypatch):
+    """Подменяет _create_task: запись ждёт release, calls считает вызовы."""
+    original = task_router._create_task
+    state = {"calls": 0, "entered": asyncio.Event(), "release": asyncio.Event()}
+
+    async def create(task):
+        state["calls"] += 1
+        state["entered"].set()
+        await state["release"].wait()
+        return await original(task)
+
+    monkeypatch.setattr(task_router, "_create_task", create)
+    return state
+
+
+async def test_same_key_replays_stored_response(client):
+    first = await client.post("/api/tasks/", json={"title": "a"}, headers=key("k1"))
+    second = await client.post("/api/tasks/", json={"title": "a"}, headers=key("k1"))
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers[REPLAYED_HEADER] == "true"
+    assert REPLAYED_HEADER not in first.headers
+    assert await task_count(client) == 1
+
+
+async def test_same_key_with_different_body_is_rejected(client):
+    await client.post("/api/tasks/", json={"title": "a"}, headers=key("k1"))
+    response = await client.post("/api/tasks/", json={"title": "b"}, headers=key("k1"))
+
+    assert response.status_code == 422
+    assert await task_count(client) == 1
+
+
+async def test_concurrent_duplicates_share_one_execution(client, slow_create):
+    requests = [
+        asyncio.create_task(client.post("/api/tasks/", json={"title": "a"}, headers=key("k1")))
+        for _ in range(3)
+    ]
+    await asyncio.wait_for(slow_create["entered"].wait(), timeout=5)
+    slow_create["release"].set()
+    responses = await asyncio.gather(*requests)
+
+    assert slow_create["calls"] == 1
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.json()["uuid"] for response in responses}) == 1
+    assert sum(REPLAYED_HEADER in response.headers for response in responses) == 2
+    assert await task_count(client) == 1
+
+
+async def test_waiters_get_the_response_when_the_first_request_is_cancelled(client, slow_create):
+    leader = asyncio.create_task(client.post("/api/tasks/", json={"title": "a"}, headers=key("k1")))
+    await asyncio.wait_for(slow_create["entered"].wait(), timeout=5)
+    waiter = asyncio.create_task(client.post("/api/tasks/", json={"title": "a"}, headers=key("k1")))
+    # Дать второму запросу дойти до ожидания первого.
+    await asyncio.sleep(0.05)
+
+    leader.cancel()
+    slow_create["release"].set()
+    response = await asyncio.wait_for(waiter, timeout=5)
+
+    assert response.status_code == 200
+    assert response.headers[REPLAYED_HEADER] == "true"
+    assert slow_create["calls"] == 1
+    assert await task_count(client) == 1
+    assert not _in_flight
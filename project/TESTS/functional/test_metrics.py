@@ -0,0 +1,93 @@
+"""GET /metrics: метки по шаблону маршрута, гистограммы SQL и Redis, типы счётчиков из StatsCollector."""
+from prometheus_client.parser import text_string_to_metric_families
+
+from conftest import bearer, create_task, register
+
+USER = {"username": "alice", "password": "secret"}
+
+
+async def scrape(client) -> dict:
+    """(имя сэмпла, метки) -> значение, плюс тип каждого семейства под ключом ("TYPE", имя)."""
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    samples = {}
+    for family in text_string_to_metric_families(response.text):
+        samples[("TYPE", family.name)] = family.type
+        for sample in family.samples:
+            samples[(sample.name, frozenset(sample.labels.items()))] = sample.value
+    return samples
+
+
+def value(samples: dict, name: str, **labels) -> float:
+    return samples.get((name, frozenset(labels.items())), 0.0)
+
+
+async def test_http_requests_are_labelled_by_route_template(client):
+    first, second = await create_task(client), await create_task(client)
+    count = "http_request_duration_seconds_count"
+    route = "/api/tasks/{task_id}"
+    before = await scrape(client)
+
+    for task in (first, second):
+        assert (await client.get(f"/api/tasks/{task['uuid']}")).status_code == 200
+    assert (await client.get("/api/tasks/missing")).status_code == 404
+    assert (await client.get("/no/such/path")).status_code == 404
+    after = await scrape(client)
+
+    assert value(after, count, method="GET", route=route, status="200") - value(
+        before, count, method="GET", route=route, status="200"
+    ) == 2
+    assert value(after, count, method="GET", route=route, status="404") - value(
+        before, count, method="GET", route=route, status="404"
+    ) == 1
+    assert value(after, count, method="GET", route="unmatched", status="404") - value(
+        before, count, method="GET", route="unmatched", status="404"
+    ) == 1
+    # Сырые пути в метки не попадают: кардинальность ограничена числом маршрутов.
+    routes = {dict(labels).get("route") for name, labels in after if name == count}
+    assert not any(task["uuid"] in route or "missing" in route for task in (first, second) for route in routes)
+
+
+async def test_sql_statements_are_timed_by_operation(client):
+    before = await scrape(client)
+
+    task = await create_task(client)
+    await client.get(f"/api/tasks/{task['uuid']}", params={"fields": "title"})
+    await client.delete(f"/api/tasks/{task['uuid']}")
+    after = await scrape(client)
+
+    for operation in ("INSERT", "SELECT", "DELETE"):
+        name = "db_statement_duration_seconds_count"
+        assert value(after, name, operation=operation) > value(before, name, operation=operation), operation
+    assert after[("TYPE", "db_statement_duration_seconds")] == "histogram"
+
+
+async def test_redis_calls_in_revocation_are_timed(client):
+    await register(client, USER)
+    token = (await client.post("/api/JWT/token", json=USER)).json()["access_token"]
+    before = await scrape(client)
+
+    assert (await client.post("/api/JWT/logout", headers=bearer(token))).status_code == 200
+    # Отозванный jti уже в Bloom-фильтре, поэтому повторный logout проверяет его в Redis.
+    assert (await client.post("/api/JWT/logout", headers=bearer(token))).status_code == 401
+    after = await scrape(client)
+
+    name = "redis_call_duration_seconds_count"
+    for operation in ("revoke_tokens", "is_revoked"):
+        assert value(after, name, operation=operation) - value(before, name, operation=operation) == 1, operation
+
+
+async def test_accumulated_stats_are_counters_and_current_values_are_gauges(client):
+    task = await create_task(client)
+    before = await scrape(client)
+
+    await client.get(f"/api/tasks/{task['uuid']}")
+    await client.get(f"/api/tasks/{task['uuid']}")
+    after = await scrape(client)
+
+    for name in ("task_cache_hits", "task_cache_misses", "task_events_delivered", "password_hasher_rejected"):
+        assert after[("TYPE", name)] == "counter", name
+    for name in ("task_events_subscribers", "password_hasher_in_flight", "write_queue_pending", "user_cache_entries"):
+        assert after[("TYPE", name)] == "gauge", name
+    assert value(after, "task_cache_hits_total") - value(before, "task_cache_hits_total") == 1
+    assert value(after, "task_cache_misses_total") - value(before, "task_cache_misses_total") == 1
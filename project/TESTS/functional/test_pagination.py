@@ -0,0 +1,88 @@
+"""GET /api/tasks/: без limit и cursor - весь список, с ними - keyset-страницы; фильтры status и title_prefix."""
+from Tasks.pagination import DEFAULT_PAGE_SIZE, NEXT_CURSOR_HEADER
+
+
+async def create_tasks(client, count: int) -> set:
+    response = await client.post("/api/tasks/bulk", json=[{"title": f"task {i}"} for i in range(count)])
+    assert response.status_code == 200, response.text
+    return {item["uuid"] for item in response.json()}
+
+
+async def test_list_without_limit_and_cursor_is_not_truncated(client):
+    created = await create_tasks(client, DEFAULT_PAGE_SIZE + 50)
+
+    response = await client.get("/api/tasks/")
+
+    assert response.status_code == 200
+    assert {task["uuid"] for task in response.json()} == created
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+async def test_pages_follow_next_cursor(client):
+    created = await create_tasks(client, DEFAULT_PAGE_SIZE + 50)
+
+    first = await client.get("/api/tasks/", params={"limit": 60})
+    assert len(first.json()) == 60
+    # Курсор без limit - страница размера по умолчанию.
+    second = await client.get("/api/tasks/", params={"cursor": first.headers[NEXT_CURSOR_HEADER]})
+    assert len(second.json()) == DEFAULT_PAGE_SIZE - 10
+    assert NEXT_CURSOR_HEADER not in second.headers
+
+    pages = first.json() + second.json()
+    assert [task["uuid"] for task in pages] == sorted(created)
+
+
+async def test_status_filter_pages_by_cursor(client):
+    response = await client.post("/api/tasks/bulk", json=[
+        {"title": f"task {i}", "status": "COMPLETED" if i % 3 == 0 else "CREATED"} for i in range(10)
+    ])
+    completed = sorted(item["uuid"] for i, item in enumerate(response.json()) if i % 3 == 0)
+
+    first = await client.get("/api/tasks/", params={"status": "COMPLETED", "limit": 3})
+    second = await client.get(
+        "/api/tasks/", params={"status": "COMPLETED", "limit": 3, "cursor": first.headers[NEXT_CURSOR_HEADER]}
+    )
+
+    pages = first.json() + second.json()
+    assert [task["uuid"] for task in pages] == completed
+    assert {task["status"] for task in pages} == {"COMPLETED"}
+    assert NEXT_CURSOR_HEADER not in second.headers
+
+
+async def test_title_prefix_is_case_sensitive_and_pages_by_cursor(client):
+    titles = ["Buy milk", "Buy bread", "buy eggs", "Buyer call", "Call mom", "Bu", "Buy_x", "Buy%"]
+    await client.post("/api/tasks/bulk", json=[{"title": title} for title in titles])
+
+    first = await client.get("/api/tasks/", params={"title_prefix": "Buy", "limit": 2})
+    rest = await client.get(
+        "/api/tasks/", params={"title_prefix": "Buy", "limit": 10, "cursor": first.headers[NEXT_CURSOR_HEADER]}
+    )
+
+    assert sorted(task["title"] for task in first.json() + rest.json()) == sorted(
+        ["Buy milk", "Buy bread", "Buyer call", "Buy_x", "Buy%"]
+    )
+    assert NEXT_CURSOR_HEADER not in rest.headers
+    # Регистр учитывается, а _ и % в префиксе - обычные символы.
+    assert [task["title"] for task in (await client.get("/api/tasks/", params={"title_prefix": "buy"})).json()] == [
+        "buy eggs"
+    ]
+    assert [task["title"] for task in (await client.get("/api/tasks/", params={"title_prefix": "Buy_"})).json()] == [
+        "Buy_x"
+    ]
+    assert [task["title"] for task in (await client.get("/api/tasks/", params={"title_prefix": "Buy%"})).json()] == [
+        "Buy%"
+    ]
+
+
+async def test_status_and_title_prefix_combine(client):
+    await client.post("/api/tasks/bulk", json=[
+        {"title": "Buy milk", "status": "COMPLETED"},
+        {"title": "Buy bread"},
+        {"title": "Call mom", "status": "COMPLETED"},
+    ])
+
+    response = await client.get("/api/tasks/", params={"status": "COMPLETED", "title_prefix": "Buy"})
+
+    assert [task["title"] for task in response.json()] == ["Buy milk"]
+    assert (await client.get("/api/tasks/", params={"status": "DONE"})).status_code == 422
+    assert (await client.get("/api/tasks/", params={"title_prefix": ""})).status_code == 422
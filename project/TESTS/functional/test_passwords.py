@@ -0,0 +1,79 @@
+"""Пул bcrypt: 503 при переполнении, слот занят до конца хеша, ошибки считаются отдельно."""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from Users import passwords
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """Пул из одного потока и одного слота; blocked держит хеш, пока не выставлен release."""
+    executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    monkeypatch.setattr(passwords, "_executor", executor)
+    monkeypatch.setattr(passwords, "_slots", asyncio.Semaphore(1))
+    monkeypatch.setattr(passwords.settings, "PASSWORD_HASH_MAX_QUEUE", 0)
+    monkeypatch.setattr(passwords, "stats", passwords.PasswordHasherStats())
+
+    def blocked(*args):
+        release.wait(timeout=5)
+        return b"$2b$04$" + b"x" * 53
+
+    yield blocked, release
+    release.set()
+    executor.shutdown(wait=True)
+
+
+async def wait_for(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition was not met")
+
+
+async def test_saturated_pool_returns_503_with_retry_after(client, pool, monkeypatch):
+    blocked, release = pool
+    monkeypatch.setattr(passwords, "_hashpw", blocked)
+    first = asyncio.create_task(client.post("/api/users/register", json={"username": "alice", "password": "secret"}))
+    await wait_for(lambda: passwords.stats.in_flight == 1)
+
+    response = await client.post("/api/users/register", json={"username": "bob", "password": "secret"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert passwords.stats.rejected == 1
+    release.set()
+    assert (await first).status_code == 200
+
+
+async def test_cancelled_caller_keeps_the_slot_until_the_hash_finishes(pool):
+    blocked, release = pool
+    caller = asyncio.create_task(passwords._run(blocked))
+    await wait_for(lambda: passwords.stats.in_flight == 1)
+
+    caller.cancel()
+    await asyncio.gather(caller, return_exceptions=True)
+
+    # bcrypt в пуле продолжает работать, поэтому слот всё ещё занят.
+    assert passwords._slots.locked()
+    assert passwords.stats.in_flight == 1
+    release.set()
+    await wait_for(lambda: not passwords._slots.locked())
+    assert passwords.stats.in_flight == 0
+    assert passwords.stats.completed == 1
+
+
+async def test_failures_are_counted_separately(pool):
+    def broken(*args):
+        raise ValueError("invalid salt")
+
+    with pytest.raises(ValueError):
+        await passwords._run(broken)
+
+    assert passwords.stats.failed == 1
+    assert passwords.stats.completed == 0
+    assert not passwords._slots.locked()
@@ -0,0 +1,101 @@
+"""Профайлер: выборка истории по времени, остановка потока и дампы медленных запросов вне event loop."""
+import asyncio
+import threading
+import time
+from collections import Counter
+
+import profiler
+from profiler import SlowRequestMiddleware, StackSampler
+
+
+def sampler_with_history(*ticks):
+    sampler = StackSampler(interval=1, history_seconds=100)
+    sampler.history.extend(ticks)
+    return sampler
+
+
+def test_samples_between_takes_only_ticks_inside_the_range():
+    sampler = sampler_with_history((1.0, ["a"]), (2.0, ["b", "a"]), (3.0, ["c"]), (4.0, ["d"]))
+
+    assert sampler.samples_between(2.0, 3.0) == Counter({"a": 1, "b": 1, "c": 1})
+    assert sampler.samples_between(4.5, 5.0) == Counter()
+
+
+def test_samples_between_stops_at_the_first_older_tick():
+    class History(list):
+        visited = 0
+
+        def __reversed__(self):
+            for item in super().__reversed__():
+                History.visited += 1
+                yield item
+
+    sampler = StackSampler(interval=1, history_seconds=100)
+    sampler.history = History((float(at), [str(at)]) for at in range(1000))
+
+    assert sampler.samples_between(997, 999) == Counter({"997": 1, "998": 1, "999": 1})
+    assert History.visited == 4
+
+
+async def test_stopping_waits_for_the_thread_outside_the_event_loop():
+    sampler = StackSampler(interval=0.001, history_seconds=1)
+    sampler.begin_window()
+    running = sampler._thread
+    # Поток, который останавливается долго, например посреди снятия стеков.
+    sampler._thread = threading.Thread(target=time.sleep, args=(0.3,))
+    sampler._thread.start()
+    heartbeats = 0
+
+    async def heartbeat():
+        nonlocal heartbeats
+        while True:
+            heartbeats += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(heartbeat())
+    window = await sampler.end_window()
+    ticker.cancel()
+
+    assert isinstance(window, Counter)
+    assert heartbeats > 5
+    running.join(timeout=1)
+    assert not running.is_alive()
+
+
+async def test_window_can_be_reopened_while_the_old_thread_stops():
+    sampler = StackSampler(interval=0.001, history_seconds=1)
+    sampler.begin_window()
+    first = sampler._thread
+    stopping = asyncio.create_task(sampler.end_window())
+    await asyncio.sleep(0)
+    sampler.begin_window()
+    await stopping
+
+    await asyncio.sleep(0.05)
+    assert sampler._thread is not first and sampler._thread.is_alive()
+    assert sum((await sampler.end_window()).values()) > 0
+    assert not first.is_alive()
+
+
+async def test_slow_request_profile_is_written_off_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler.settings, "PROFILER_SLOW_REQUEST_MS", 1)
+    monkeypatch.setattr(profiler.settings, "PROFILER_DUMP_DIR", str(tmp_path))
+    loop_thread = threading.get_ident()
+    capture_threads = []
+
+    def samples_between(started, finished):
+        capture_threads.append(threading.get_ident())
+        return Counter({"main;handler": 3})
+
+    monkeypatch.setattr(profiler.sampler, "samples_between", samples_between)
+
+    async def slow_app(scope, receive, send):
+        await asyncio.sleep(0.01)
+
+    scope = {"type": "http", "method": "GET", "path": "/api/tasks/"}
+    await SlowRequestMiddleware(slow_app)(scope, None, None)
+
+    assert capture_threads and capture_threads[0] != loop_thread
+    [dump] = tmp_path.iterdir()
+    assert dump.name.endswith("-GET-api_tasks.collapsed")
+    assert dump.read_text() == "main;handler 3\n"
@@ -0,0 +1,74 @@
+"""Ограничители /api/JWT/token и /api/users/register: token bucket и предел одновременных запросов."""
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+import ratelimit
+from JWT import router as jwt_router
+from conftest import bearer, register
+from ratelimit import RouteLimit
+
+USER = {"username": "alice", "password": "secret"}
+
+
+@pytest.fixture(autouse=True)
+def rate_limit_enabled(monkeypatch):
+    monkeypatch.setattr(ratelimit.settings, "RATE_LIMIT_ENABLED", True)
+
+
+async def test_bucket_rejects_with_retry_after(client, monkeypatch):
+    monkeypatch.setitem(ratelimit.ROUTE_LIMITS, "register", RouteLimit(capacity=2, per_second=0.5, max_in_flight=32))
+
+    for i in range(2):
+        await register(client, {"username": f"user-{i}", "password": "secret"})
+    response = await client.post("/api/users/register", json={"username": "user-2", "password": "secret"})
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) == 2
+
+
+async def test_authenticated_clients_get_their_own_buckets(client, monkeypatch):
+    alice = await register(client, USER)
+    bob = await register(client, {"username": "bob", "password": "secret"})
+    alice_token = await jwt_router.create_access_token({"username": "alice", "id": alice["id"]})
+    bob_token = await jwt_router.create_access_token({"username": "bob", "id": bob["id"]})
+    request = Request({"type": "http", "headers": [(b"authorization", f"Bearer {alice_token}".encode())]})
+    assert ratelimit.client_identity(request) == f"user:{alice['id']}"
+
+    monkeypatch.setitem(ratelimit.ROUTE_LIMITS, "token", RouteLimit(capacity=1, per_second=0.01, max_in_flight=64))
+    assert (await client.post("/api/JWT/token", json=USER, headers=bearer(alice_token))).status_code == 200
+    assert (await client.post("/api/JWT/token", json=USER, headers=bearer(alice_token))).status_code == 429
+    # Тот же IP, но другой пользователь - другой bucket.
+    assert (await client.post("/api/JWT/token", json=USER, headers=bearer(bob_token))).status_code == 200
+
+
+async def test_in_flight_cap_rejects_without_waiting(client, monkeypatch):
+    await register(client, USER)
+    monkeypatch.setitem(ratelimit.ROUTE_LIMITS, "token", RouteLimit(capacity=100, per_second=100, max_in_flight=1))
+    entered, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_verify(password, hashed_password):
+        entered.set()
+        await release.wait()
+        return True
+
+    monkeypatch.setattr(jwt_router, "verify_password", slow_verify)
+    first = asyncio.create_task(client.post("/api/JWT/token", json=USER))
+    await asyncio.wait_for(entered.wait(), timeout=5)
+
+    second = await client.post("/api/JWT/token", json=USER)
+    assert second.status_code == 429
+    assert second.headers["Retry-After"] == "1"
+
+    release.set()
+    assert (await first).status_code == 200
+    assert ratelimit.in_flight["token"] == 0
+
+
+async def test_disabled_limiter_lets_everything_through(client, monkeypatch):
+    monkeypatch.setattr(ratelimit.settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setitem(ratelimit.ROUTE_LIMITS, "register", RouteLimit(capacity=1, per_second=0.01, max_in_flight=1))
+
+    for i in range(3):
+        await register(client, {"username": f"user-{i}", "password": "secret"})
@@ -0,0 +1,119 @@
+"""Отзыв JWT: logout при закэшированном токене, повтор refresh-токена, восстановление Bloom-фильтра."""
+import asyncio
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from JWT import revocation
+from JWT import router as jwt_router
+from JWT.revocation import REVOCATION_CHANNEL, REVOKED_KEY_PREFIX, is_revoked, rebuild_revoked_filter
+from JWT.router import check_access_token
+from JWT.token_cache import token_cache, token_key
+from conftest import bearer, register
+from redis_client import redis
+
+USER = {"username": "alice", "password": "secret"}
+
+
+def jti(token: str) -> str:
+    return jwt.decode(token, options={"verify_signature": False})["jti"]
+
+
+async def login(client) -> str:
+    await register(client, USER)
+    response = await client.post("/api/JWT/token", json=USER)
+    assert response.status_code == 200, response.text
+    return response.json()["access_token"]
+
+
+async def assert_rejected(token: str) -> None:
+    with pytest.raises(HTTPException) as error:
+        await check_access_token(token)
+    assert error.value.status_code == 401
+
+
+async def test_logout_rejects_access_token_already_in_cache(client):
+    token = await login(client)
+    await check_access_token(token)
+    assert token_cache.get(token) is not None
+
+    response = await client.post("/api/JWT/logout", headers=bearer(token))
+    assert response.status_code == 200, response.text
+
+    assert token_cache.get(token) is None
+    await assert_rejected(token)
+    assert (await client.post("/api/JWT/logout", headers=bearer(token))).status_code == 401
+
+
+async def test_revocation_from_another_worker_evicts_cached_token(client):
+    token = await login(client)
+    await check_access_token(token)
+
+    # Другой воркер отзывает токен: ключ в Redis и сообщение в канал, локальный кэш он не трогает.
+    await redis.set(f"{REVOKED_KEY_PREFIX}{jti(token)}", "1", ex=60)
+    await redis.publish(REVOCATION_CHANNEL, f"{jti(token)} {token_key(token)}")
+    for _ in range(100):
+        if token_cache.get(token) is None:
+            break
+        await asyncio.sleep(0.01)
+
+    assert token_cache.get(token) is None
+    await assert_rejected(token)
+
+
+async def test_refresh_token_cannot_be_reused(client):
+    token = await login(client)
+    old_refresh = client.cookies["refresh_token"]
+
+    response = await client.post("/api/JWT/refresh-token", headers=bearer(token))
+    assert response.status_code == 200, response.text
+    new_token = response.json()["access_token"]
+    assert client.cookies["refresh_token"] != old_refresh
+
+    client.cookies.set("refresh_token", old_refresh)
+    reused = await client.post("/api/JWT/refresh-token", headers=bearer(new_token))
+    assert reused.status_code == 401
+    assert reused.json()["detail"] == "Invalid or blacklisted refresh token"
+    # Старый access-токен отозван вместе с ним.
+    await assert_rejected(token)
+
+
+async def test_bloom_filter_is_rebuilt_from_redis_after_restart(client, monkeypatch):
+    token = await login(client)
+    assert (await client.post("/api/JWT/logout", headers=bearer(token))).status_code == 200
+
+    # Новый процесс: пустой фильтр, которому ещё нельзя верить, и пустой кэш.
+    monkeypatch.setattr(revocation, "revoked_filter", revocation._new_filter())
+    monkeypatch.setattr(revocation, "filter_ready", False)
+    token_cache.clear()
+    assert jti(token) not in revocation.revoked_filter
+    assert await is_revoked(jti(token))
+
+    await rebuild_revoked_filter()
+
+    assert revocation.filter_ready
+    assert jti(token) in revocation.revoked_filter
+    assert await is_revoked(jti(token))
+    assert not await is_revoked("never-issued")
+    await assert_rejected(token)
+
+
+async def test_revocation_during_check_is_not_overwritten_by_cache_put(client, monkeypatch):
+    token = await login(client)
+    original = jwt_router.is_revoked
+
+    async def is_revoked_then_revoked_elsewhere(token_jti):
+        revoked = await original(token_jti)
+        # Пока шла проверка в Redis, другой воркер отозвал токен и слушатель уже обработал сообщение.
+        await redis.set(f"{REVOKED_KEY_PREFIX}{token_jti}", "1", ex=60)
+        revocation._remember(token_jti)
+        token_cache.discard(token_key(token))
+        return revoked
+
+    monkeypatch.setattr(jwt_router, "is_revoked", is_revoked_then_revoked_elsewhere)
+    await check_access_token(token)
+    monkeypatch.setattr(jwt_router, "is_revoked", original)
+
+    assert token_cache.get(token) is None
+    await assert_rejected(token)
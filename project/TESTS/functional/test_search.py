@@ -0,0 +1,50 @@
+"""Полнотекстовый поиск: индекс следует за вставкой, изменением и удалением задач."""
+import sqlite3
+
+import pytest
+
+from config import settings
+from conftest import create_task
+
+
+async def search(client, q: str) -> set:
+    response = await client.get("/api/tasks/search", params={"q": q})
+    assert response.status_code == 200, response.text
+    return {task["title"] for task in response.json()}
+
+
+async def test_search_follows_insert_update_and_delete(client):
+    first = (await create_task(client, "Buy milk", description="before breakfast"))["uuid"]
+    await client.post("/api/tasks/bulk", json=[{"title": "Buy bread"}, {"title": "Call mom", "description": "milk"}])
+    assert await search(client, "milk") == {"Buy milk", "Call mom"}
+
+    await client.patch(f"/api/tasks/{first}", json={"title": "Buy coffee"})
+    assert await search(client, "milk") == {"Call mom"}
+    assert await search(client, "coffee") == {"Buy coffee"}
+    assert await search(client, "breakfast") == {"Buy coffee"}
+
+    await client.delete(f"/api/tasks/{first}")
+    assert await search(client, "coffee") == set()
+    assert await search(client, "buy") == {"Buy bread"}
+
+
+async def test_search_survives_rowid_renumbering(client, backend):
+    if backend != "sqlite":
+        pytest.skip("rowid - особенность SQLite")
+    await create_task(client, "Water plants")
+    await create_task(client, "Feed cat")
+
+    # VACUUM или пересоздание таблицы может перенумеровать rowid у таблицы без INTEGER PRIMARY KEY;
+    # здесь это делается явно. Отдельное соединение: у движка приложения BEGIN IMMEDIATE.
+    connection = sqlite3.connect(settings.SQL_DATABASE, isolation_level=None)
+    try:
+        connection.execute("UPDATE tasks SET rowid = 1000 - rowid")
+        connection.execute("VACUUM")
+        connection.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('integrity-check')")
+    finally:
+        connection.close()
+
+    assert await search(client, "plants") == {"Water plants"}
+    assert await search(client, "cat") == {"Feed cat"}
+    await create_task(client, "Water garden")
+    assert await search(client, "water") == {"Water plants", "Water garden"}
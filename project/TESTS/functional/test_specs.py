@@ -0,0 +1,32 @@
+"""Сценарии из TESTS/specs/*.spec как тесты pytest: один тест на сценарий (заголовок ##)."""
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from steps import match_step
+
+SPECS_DIR = Path(__file__).resolve().parent.parent / "specs"
+
+
+def load_scenarios() -> List[Tuple[str, str, List[str]]]:
+    scenarios = []
+    for spec in sorted(SPECS_DIR.glob("*.spec")):
+        for line in spec.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line.startswith("## "):
+                scenarios.append((spec.stem, line[3:].strip(), []))
+            elif line.startswith("* ") and scenarios:
+                scenarios[-1][2].append(line[2:].strip())
+    return scenarios
+
+
+@pytest.mark.parametrize(
+    "steps",
+    [pytest.param(steps, id=f"{spec}: {name}") for spec, name, steps in load_scenarios()],
+)
+async def test_scenario(client, steps):
+    scenario = {}
+    for line in steps:
+        fn, args = match_step(line)
+        await fn(client, scenario, *args)
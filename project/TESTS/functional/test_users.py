@@ -0,0 +1,89 @@
+"""Регистрация и кэш пользователей: инвалидация после регистрации и перехеширования, занятое имя - 400."""
+from sqlalchemy import select
+
+import database
+from Users import router as users_router
+from Users.cache import CachedUser, user_cache
+from Users.models import Users
+from config import settings
+from conftest import register
+
+USER = {"username": "alice", "password": "secret"}
+TAKEN = "Пользователь с таким именем уже существует"
+
+
+async def stored_hash(username: str) -> str:
+    async with database.read_session_factory() as session:
+        return (await session.execute(select(Users.hashed_password).where(Users.username == username))).scalar_one()
+
+
+async def login(client, user=USER):
+    return await client.post("/api/JWT/token", json=user)
+
+
+async def test_login_caches_user_and_rehash_invalidates_it(client, monkeypatch):
+    await register(client, USER)
+    assert (await login(client)).status_code == 200
+    cached = user_cache.get("alice")
+    assert cached is not None
+    assert cached.hashed_password == await stored_hash("alice")
+
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    assert (await login(client)).status_code == 200
+
+    # Перехеширование сбросило запись, следующий логин берёт новый хеш из базы и повторно не перехеширует.
+    assert user_cache.get("alice") is None
+    rehashed = await stored_hash("alice")
+    assert rehashed.startswith("$2b$05$")
+    assert (await login(client)).status_code == 200
+    assert user_cache.get("alice").hashed_password == rehashed == await stored_hash("alice")
+
+
+async def test_register_drops_user_cached_while_it_was_running(client, monkeypatch):
+    hash_password = users_router.hash_password
+
+    async def hash_and_cache_stale_row(password):
+        # Пока идёт хеширование, другой запрос успевает закэшировать устаревшую строку.
+        user_cache.put(CachedUser(id=-1, username="alice", hashed_password="stale"))
+        return await hash_password(password)
+
+    monkeypatch.setattr(users_router, "hash_password", hash_and_cache_stale_row)
+    created = await register(client, USER)
+
+    assert user_cache.get("alice") is None
+    assert (await login(client)).status_code == 200
+    assert user_cache.get("alice").id == created["id"]
+
+
+async def test_taken_username_is_rejected_before_hashing(client, monkeypatch):
+    await register(client, USER)
+    calls = []
+
+    async def hash_password(password):
+        calls.append(password)
+        return "unused"
+
+    monkeypatch.setattr(users_router, "hash_password", hash_password)
+    response = await client.post("/api/users/register", json={"username": "alice", "password": "other"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == TAKEN
+    assert calls == []
+
+
+async def test_concurrent_registration_integrity_error_maps_to_400(client, monkeypatch):
+    await register(client, USER)
+
+    async def not_found_yet(db, username):
+        # Параллельная регистрация ещё не была видна при проверке имени.
+        return None
+
+    monkeypatch.setattr(users_router, "get_user", not_found_yet)
+    response = await client.post("/api/users/register", json={"username": "alice", "password": "other"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == TAKEN
+    monkeypatch.undo()
+    # Пароль первого пользователя не перезаписан.
+    assert (await login(client)).status_code == 200
+    assert (await login(client, {"username": "alice", "password": "other"})).status_code == 401
@@ -0,0 +1,111 @@
+"""WriteQueue: пачки в одной транзакции, SAVEPOINT на задание, отменённые вызывающие."""
+import asyncio
+
+import pytest
+from sqlalchemy import insert, select
+
+import database
+from database import WriteQueue
+from Tasks.models import TaskCounter
+
+
+class CountingFactory:
+    """Фабрика сессий, считающая открытые сессии: одна сессия на пачку."""
+
+    def __init__(self):
+        self.sessions = 0
+
+    def __call__(self):
+        self.sessions += 1
+        return database.async_session_factory()
+
+
+def insert_counter(name: str, fail: bool = False):
+    async def job(db):
+        await db.execute(insert(TaskCounter).values(name=name, value=1))
+        if fail:
+            raise ValueError(name)
+        return name
+    return job
+
+
+async def stored_names():
+    async with database.read_session_factory() as session:
+        return set((await session.execute(select(TaskCounter.name))).scalars())
+
+
+@pytest.fixture
+def factory():
+    return CountingFactory()
+
+
+@pytest.fixture
+async def queue(clean_state, factory):
+    queue = WriteQueue(factory, max_batch=64)
+    yield queue
+    await queue.close()
+
+
+async def test_jobs_submitted_together_share_one_transaction(queue, factory):
+    results = await asyncio.gather(*(queue.submit(insert_counter(f"job-{i}")) for i in range(5)))
+
+    assert results == [f"job-{i}" for i in range(5)]
+    assert factory.sessions == 1
+    assert await stored_names() == {f"job-{i}" for i in range(5)}
+
+
+async def test_batch_size_is_limited(queue, factory):
+    queue.max_batch = 2
+    await asyncio.gather(*(queue.submit(insert_counter(f"job-{i}")) for i in range(5)))
+
+    assert factory.sessions == 3
+    assert len(await stored_names()) == 5
+
+
+async def test_failing_job_rolls_back_only_its_savepoint(queue, factory):
+    results = await asyncio.gather(
+        queue.submit(insert_counter("first")),
+        queue.submit(insert_counter("broken", fail=True)),
+        queue.submit(insert_counter("last")),
+        return_exceptions=True,
+    )
+
+    assert results[0] == "first" and results[2] == "last"
+    assert isinstance(results[1], ValueError)
+    assert factory.sessions == 1
+    assert await stored_names() == {"first", "last"}
+
+
+async def test_caller_cancelled_before_batch_starts_is_skipped(queue):
+    first = asyncio.create_task(queue.submit(insert_counter("first")))
+    cancelled = asyncio.create_task(queue.submit(insert_counter("cancelled")))
+    last = asyncio.create_task(queue.submit(insert_counter("last")))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await first == "first"
+    assert await last == "last"
+    assert cancelled.cancelled()
+    assert await stored_names() == {"first", "last"}
+
+
+async def test_caller_cancelled_while_its_job_runs_does_not_break_the_batch(queue):
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow(db):
+        await db.execute(insert(TaskCounter).values(name="slow", value=1))
+        started.set()
+        await release.wait()
+        return "slow"
+
+    cancelled = asyncio.create_task(queue.submit(slow))
+    last = asyncio.create_task(queue.submit(insert_counter("last")))
+    await started.wait()
+    cancelled.cancel()
+    release.set()
+
+    assert await last == "last"
+    assert cancelled.cancelled()
+    # Задание уже выполнялось, поэтому его запись фиксируется вместе с пачкой.
+    assert await stored_names() == {"slow", "last"}
+    assert await queue.submit(insert_counter("after")) == "after"
@@ -0,0 +1,145 @@
+import logging
+import time
+from dataclasses import dataclass, asdict
+from typing import Mapping, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from config import settings
+from redis_client import redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "tasks:cache:"
+CACHE_INDEX_KEY = "tasks:cache:index"
+# Меняется при удалении всех задач: запись, прочитанная из базы до этого, в кэш не попадёт.
+CACHE_EPOCH_KEY = "tasks:cache-epoch"
+
+# Версия для отметки об удалении: больше любой версии задачи.
+DELETED_VERSION = 2 ** 62
+
+# Значение в кэше - "<version>|<payload>". Инвалидация оставляет отметку "<version>|" с версией
+# после изменения. Запись из базы кладётся, только если её версия не старше той, что уже лежит
+# в кэше: иначе чтение, начавшееся до изменения, вернуло бы в кэш устаревшую задачу на весь TTL.
+CACHE_SET_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[4] then
+    return -1
+end
+local current = redis.call('GET', KEYS[1])
+if current then
+    local separator = string.find(current, '|', 1, true)
+    local cached_version = tonumber(string.sub(current, 1, separator - 1))
+    local version = tonumber(ARGV[1])
+    local tombstone = separator == string.len(current)
+    if version < cached_version or (version == cached_version and not tombstone) then
+        return -1
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1] .. '|' .. ARGV[2], 'EX', ARGV[3])
+redis.call('ZADD', KEYS[3], ARGV[5], ARGV[6])
+return redis.call('ZCARD', KEYS[3])
+"""
+
+cache_set = redis.register_script(CACHE_SET_SCRIPT)
+
+
+@dataclass
+class TaskCacheStats:
+    hits: int = 0
+    misses: int = 0
+    errors: int = 0
+    evictions: int = 0
+    stale_writes_skipped: int = 0
+
+
+stats = TaskCacheStats()
+
+
+def _key(task_id: str) -> str:
+    return f"{CACHE_KEY_PREFIX}{task_id}"
+
+
+def cache_stats() -> dict:
+    return asdict(stats)
+
+
+async def get_cached_task(task_id: str) -> Tuple[Optional[str], str]:
+    """Возвращает сериализованный TaskOut из кэша (None при промахе) и эпоху кэша.
+
+    Эпоху нужно передать в cache_task вместе с прочитанной из базы задачей.
+    Недоступный Redis считается промахом: чтение уходит в базу.
+    """
+    if not settings.TASK_CACHE_ENABLED:
+        return None, "0"
+    try:
+        value, epoch = await redis.mget(_key(task_id), CACHE_EPOCH_KEY)
+    except RedisError:
+        stats.errors += 1
+        logger.warning("Task cache read failed", exc_info=True)
+        return None, "0"
+    payload = value.partition("|")[2] if value is not None else ""
+    if not payload:
+        stats.misses += 1
+        return None, epoch or "0"
+    stats.hits += 1
+    return payload, epoch or "0"
+
+
+async def cache_task(task_id: str, payload: str, version: int, epoch: str) -> None:
+    """Кладёт задачу версии version в кэш, если там нет более новой, и вытесняет самые старые
+    записи сверх TASK_CACHE_MAX_ENTRIES."""
+    if not settings.TASK_CACHE_ENABLED:
+        return
+    try:
+        size = await cache_set(
+            keys=[_key(task_id), CACHE_EPOCH_KEY, CACHE_INDEX_KEY],
+            args=[version, payload, settings.TASK_CACHE_TTL_SECONDS, epoch, time.time(), task_id],
+        )
+        if size < 0:
+            stats.stale_writes_skipped += 1
+            return
+
+        overflow = size - settings.TASK_CACHE_MAX_ENTRIES
+        if overflow > 0:
+            evicted = [task_id for task_id, _ in await redis.zpopmin(CACHE_INDEX_KEY, overflow)]
+            if evicted:
+                await redis.delete(*map(_key, evicted))
+                stats.evictions += len(evicted)
+    except RedisError:
+        stats.errors += 1
+        logger.warning("Task cache write failed", exc_info=True)
+
+
+async def invalidate_tasks(versions: Mapping[str, int]) -> None:
+    """Заменяет записи отметками с версиями задач после изменения (task_id -> version)."""
+    if not settings.TASK_CACHE_ENABLED or not versions:
+        return
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            for task_id, version in versions.items():
+                pipe.set(_key(task_id), f"{version}|", ex=settings.TASK_CACHE_TOMBSTONE_SECONDS)
+            pipe.zrem(CACHE_INDEX_KEY, *versions)
+            await pipe.execute()
+    except RedisError:
+        stats.errors += 1
+        logger.warning("Task cache invalidation failed", exc_info=True)
+
+
+async def invalidate_deleted(*task_ids: str) -> None:
+    await invalidate_tasks(dict.fromkeys(task_ids, DELETED_VERSION))
+
+
+async def invalidate_all() -> None:
+    if not settings.TASK_CACHE_ENABLED:
+        return
+    try:
+        await redis.incr(CACHE_EPOCH_KEY)
+        task_ids = await redis.zrange(CACHE_INDEX_KEY, 0, -1)
+        async with redis.pipeline(transaction=False) as pipe:
+            if task_ids:
+                pipe.delete(*map(_key, task_ids))
+            pipe.delete(CACHE_INDEX_KEY)
+            await pipe.execute()
+    except RedisError:
+        stats.errors += 1
+        logger.warning("Task cache invalidation failed", exc_info=True)
@@ -0,0 +1,50 @@
+import hashlib
+from typing import Optional, Set
+
+from fastapi import Response
+
+ETAG_HEADER = "ETag"
+
+
+def task_etag(version: int) -> str:
+    return f'"v{version}"'
+
+
+def list_etag(table_version: int, query: str) -> str:
+    # Одна и та же версия таблицы и одни и те же параметры дают байт-в-байт тот же ответ,
+    # поэтому ETag можно считать сильным.
+    digest = hashlib.blake2b(f"{table_version}?{query}".encode("utf-8"), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def parse_if_match(if_match: Optional[str]) -> Optional[Set[int]]:
+    """Возвращает допустимые версии задачи из If-Match или None, если условие не задано.
+
+    If-Match требует сильного сравнения, поэтому слабые и чужие ETag в множество не попадают.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = set()
+    for candidate in if_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith('"v') and candidate.endswith('"') and candidate[2:-1].isdigit():
+            versions.add(int(candidate[2:-1]))
+    return versions
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={ETAG_HEADER: etag})
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Dict, Iterable, Mapping, Optional
+
+from sqlalchemy import delete, func, insert, select, text, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import run_write
+from .models import Task, TaskCounter, TaskCounterDelta, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+# Общая версия таблицы tasks: меняется при любой записи, по ней строится ETag списка.
+TABLE_VERSION = "version"
+# Количество задач в статусе: status:CREATED, status:IN_PROGRESS, status:COMPLETED.
+STATUS_COUNTER_PREFIX = "status:"
+
+# Значение счётчика = строка task_counters + несвёрнутые приращения из task_counter_deltas.
+# В SQLite все записи и так идут через один writer, поэтому там счётчики обновляются на месте.
+# В Postgres UPDATE общей строки выстроил бы в очередь все пишущие транзакции, поэтому каждая
+# из них добавляет свои приращения отдельными строками. Последовательность (nextval) для версии
+# не подходит: она видна до коммита, и читатель успел бы отдать старые данные с новым ETag.
+COMPACT_COUNTERS_SQL = text(
+    "WITH moved AS (DELETE FROM task_counter_deltas RETURNING name, delta) "
+    "INSERT INTO task_counters (name, value) SELECT name, sum(delta) FROM moved GROUP BY name "
+    "ON CONFLICT (name) DO UPDATE SET value = task_counters.value + excluded.value"
+)
+
+
+def _appends_deltas(db: AsyncSession) -> bool:
+    return db.bind.dialect.name == "postgresql"
+
+
+def _upsert(db: AsyncSession, name: str, value: int, set_):
+    insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(TaskCounter).values(name=name, value=value)
+    return stmt.on_conflict_do_update(index_elements=[TaskCounter.name], set_=set_)
+
+
+async def bump_counters(db: AsyncSession, deltas: Mapping[str, int]) -> None:
+    """Атомарно прибавляет приращения к счётчикам в текущей транзакции."""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    if _appends_deltas(db):
+        await db.execute(insert(TaskCounterDelta), [{"name": name, "delta": delta} for name, delta in deltas.items()])
+        return
+    for name, delta in deltas.items():
+        await db.execute(_upsert(db, name, delta, {"value": TaskCounter.value + delta}))
+
+
+async def bump_counter(db: AsyncSession, name: str, delta: int = 1) -> None:
+    await bump_counters(db, {name: delta})
+
+
+async def set_counter(db: AsyncSession, name: str, value: int) -> None:
+    await db.execute(_upsert(db, name, value, {"value": value}))
+    await db.execute(delete(TaskCounterDelta).where(TaskCounterDelta.name == name))
+
+
+async def get_counter(db: AsyncSession, name: str) -> int:
+    # Один запрос - один снимок: строка и приращения согласованы даже во время свёртки.
+    stored = select(TaskCounter.value).where(TaskCounter.name == name).scalar_subquery()
+    pending = select(func.sum(TaskCounterDelta.delta)).where(TaskCounterDelta.name == name).scalar_subquery()
+    result = await db.execute(select(func.coalesce(stored, 0) + func.coalesce(pending, 0)))
+    return result.scalar_one()
+
+
+async def get_counters(db: AsyncSession, prefix: str) -> Dict[str, int]:
+    """Все счётчики с именем на prefix."""
+    result = await db.execute(union_all(
+        select(TaskCounter.name, TaskCounter.value).where(TaskCounter.name.startswith(prefix)),
+        select(TaskCounterDelta.name, func.sum(TaskCounterDelta.delta))
+        .where(TaskCounterDelta.name.startswith(prefix))
+        .group_by(TaskCounterDelta.name),
+    ))
+    counters = Counter()
+    for name, value in result.all():
+        counters[name] += value
+    return dict(counters)
+
+
+async def bump_table_version(db: AsyncSession) -> None:
+    await bump_counter(db, TABLE_VERSION)
+
+
+async def compact_counters(db: AsyncSession) -> None:
+    """Сворачивает накопленные приращения в task_counters одним запросом (только Postgres)."""
+    if _appends_deltas(db):
+        await db.execute(COMPACT_COUNTERS_SQL)
+
+
+def status_counter(status) -> str:
+    return f"{STATUS_COUNTER_PREFIX}{TaskStatus(status).value}"
+
+
+def status_deltas(added: Iterable = (), removed: Iterable = ()) -> Counter:
+    """Изменения счётчиков статусов: +1 за каждый статус из added, -1 за каждый из removed."""
+    deltas = Counter(status_counter(status) for status in added if status is not None)
+    deltas.subtract(status_counter(status) for status in removed if status is not None)
+    return deltas
+
+
+async def bump_status_counters(db: AsyncSession, deltas: Counter) -> None:
+    await bump_counters(db, deltas)
+
+
+async def get_status_counts(db: AsyncSession) -> Dict[str, int]:
+    stored = await get_counters(db, STATUS_COUNTER_PREFIX)
+    return {status.value: stored.get(status_counter(status), 0) for status in TaskStatus}
+
+
+async def reset_status_counters(db: AsyncSession, status: Optional[TaskStatus] = None) -> None:
+    for each in ([status] if status is not None else TaskStatus):
+        await set_counter(db, status_counter(each), 0)
+
+
+async def reconcile_status_counters(db: AsyncSession) -> Dict[str, int]:
+    """Пересчитывает счётчики статусов по GROUP BY и возвращает найденные расхождения."""
+    result = await db.execute(select(Task.status, func.count()).group_by(Task.status))
+    actual = {status: count for status, count in result.all() if status is not None}
+    stored = await get_status_counts(db)
+    drift = {}
+    for status in TaskStatus:
+        count = actual.get(status, 0)
+        if stored[status.value] != count:
+            drift[status.value] = count - stored[status.value]
+        await set_counter(db, status_counter(status), count)
+    return drift
+
+
+async def reconcile_status_counters_periodically() -> None:
+    """Фоновая задача: сверка при старте и затем раз в TASK_STATS_RECONCILE_SECONDS.
+
+    В SQLite все записи идут через один writer, поэтому сверка видит точное состояние. В Postgres
+    запись, закоммиченная между GROUP BY и обновлением счётчиков, может дать небольшое расхождение
+    до следующей сверки.
+    """
+    while True:
+        try:
+            drift = await run_write(reconcile_status_counters)
+            if drift:
+                logger.warning("Task status counters drifted, corrected: %s", drift)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Task status counters reconciliation failed")
+        await asyncio.sleep(settings.TASK_STATS_RECONCILE_SECONDS)
+
+
+async def compact_counters_periodically() -> None:
+    """Фоновая задача для Postgres: раз в TASK_COUNTERS_COMPACT_SECONDS сворачивает приращения счётчиков."""
+    while True:
+        await asyncio.sleep(settings.TASK_COUNTERS_COMPACT_SECONDS)
+        try:
+            await run_write(compact_counters)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Task counters compaction failed")
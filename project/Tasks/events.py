@@ -0,0 +1,193 @@
+import asyncio
+import json
+import logging
+import re
+from dataclasses import dataclass, asdict
+from typing import AsyncIterator, Optional, Set, Tuple
+
+from redis.exceptions import RedisError
+
+from config import settings
+from redis_client import redis
+
+logger = logging.getLogger(__name__)
+
+# Redis Stream, а не pub/sub: у записей есть id, по которому клиент продолжает с места обрыва.
+EVENTS_STREAM_KEY = "tasks:events"
+EVENT_FIELD = "event"
+
+_EVENT_ID = re.compile(r"^\d+-\d+$")
+
+Event = Tuple[str, str]
+
+
+@dataclass
+class TaskEventStats:
+    subscribers: int = 0
+    delivered: int = 0
+    dropped_subscribers: int = 0
+    publish_errors: int = 0
+    replay_errors: int = 0
+
+
+stats = TaskEventStats()
+
+
+class EventsUnavailable(Exception):
+    """История событий не прочитана из Redis: клиенту нужно переподключиться позже с тем же id."""
+
+
+def event_stats() -> dict:
+    return asdict(stats)
+
+
+def is_event_id(value: str) -> bool:
+    return bool(_EVENT_ID.match(value))
+
+
+def _id_tuple(event_id: str) -> Tuple[int, int]:
+    ms, _, seq = event_id.partition("-")
+    return int(ms), int(seq)
+
+
+def task_event(event_type: str, data: dict) -> dict:
+    return {"type": event_type, "data": data}
+
+
+async def publish_events(*events: dict) -> None:
+    """Добавляет события в поток одним пайплайном. Ошибка Redis не ломает запись задачи."""
+    if not settings.TASK_EVENTS_ENABLED or not events:
+        return
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.xadd(
+                    EVENTS_STREAM_KEY,
+                    {EVENT_FIELD: json.dumps(event, ensure_ascii=False)},
+                    maxlen=settings.TASK_EVENTS_STREAM_MAXLEN,
+                    approximate=True,
+                )
+            await pipe.execute()
+    except RedisError:
+        stats.publish_errors += 1
+        logger.warning("Task events publish failed", exc_info=True)
+
+
+class _Subscriber:
+    def __init__(self, max_queue: int):
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+
+
+class EventHub:
+    """Раздаёт события из одного читателя потока всем подключённым клиентам воркера.
+
+    У каждого клиента ограниченная очередь. Если клиент не успевает её разбирать, он отключается:
+    очередь очищается и в неё кладётся None. Переподключившись с последним полученным id,
+    клиент дочитает пропущенное из потока.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[_Subscriber] = set()
+
+    def subscribe(self) -> _Subscriber:
+        subscriber = _Subscriber(settings.TASK_EVENTS_CLIENT_QUEUE)
+        self._subscribers.add(subscriber)
+        stats.subscribers = len(self._subscribers)
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+        stats.subscribers = len(self._subscribers)
+
+    def dispatch(self, event: Event) -> None:
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.unsubscribe(subscriber)
+                stats.dropped_subscribers += 1
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(None)
+
+
+hub = EventHub()
+
+
+async def _last_event_id() -> str:
+    entries = await redis.xrevrange(EVENTS_STREAM_KEY, count=1)
+    return entries[0][0] if entries else "0-0"
+
+
+async def read_events() -> None:
+    """Фоновая задача: единственный на воркер XREAD по потоку событий."""
+    last_id = None
+    while True:
+        try:
+            if last_id is None:
+                last_id = await _last_event_id()
+            response = await redis.xread(
+                {EVENTS_STREAM_KEY: last_id},
+                block=settings.TASK_EVENTS_HEARTBEAT_SECONDS * 1000,
+                count=500,
+            )
+            for _, entries in response or ():
+                for event_id, fields in entries:
+                    last_id = event_id
+                    hub.dispatch((event_id, fields[EVENT_FIELD]))
+        except asyncio.CancelledError:
+            raise
+        except RedisError:
+            logger.warning("Task events reader disconnected, retrying", exc_info=True)
+            await asyncio.sleep(1)
+
+
+async def _replay(after: str) -> AsyncIterator[Event]:
+    while True:
+        try:
+            entries = await redis.xrange(EVENTS_STREAM_KEY, min=f"({after}", count=1000)
+        except RedisError as exc:
+            # Продолжать без истории нельзя: клиент молча потерял бы события после своего id.
+            stats.replay_errors += 1
+            logger.warning("Task events replay failed", exc_info=True)
+            raise EventsUnavailable from exc
+        for event_id, fields in entries:
+            yield event_id, fields[EVENT_FIELD]
+        if len(entries) < 1000:
+            return
+        after = entries[-1][0]
+
+
+async def iter_events(offset: Optional[str] = None) -> AsyncIterator[Optional[Event]]:
+    """События начиная после offset (или с момента подключения).
+
+    None означает, что за TASK_EVENTS_HEARTBEAT_SECONDS ничего не произошло - время для heartbeat.
+    Итерация заканчивается, если клиент отстал и был отключён. Если историю после offset
+    не удалось прочитать, поднимается EventsUnavailable.
+    """
+    subscriber = hub.subscribe()
+    try:
+        last = None
+        if offset is not None:
+            # Подписка оформлена до чтения истории, поэтому на стыке ничего не теряется,
+            # а повторы отсекаются по id.
+            async for event in _replay(offset):
+                last = _id_tuple(event[0])
+                stats.delivered += 1
+                yield event
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscriber.queue.get(), timeout=settings.TASK_EVENTS_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if event is None:
+                return
+            if last is not None and _id_tuple(event[0]) <= last:
+                continue
+            stats.delivered += 1
+            yield event
+    finally:
+        hub.unsubscribe(subscriber)
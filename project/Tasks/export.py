@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+
+from sqlalchemy import select
+
+from database import read_session_factory
+from . import models
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FIELDS = ("uuid", "title", "description", "status")
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def export_statement(status=None):
+    # Выбираем колонки, а не models.Task: строки приходят кортежами, ORM-объекты не создаются.
+    stmt = select(
+        models.Task.uuid,
+        models.Task.title,
+        models.Task.description,
+        models.Task.status,
+    ).order_by(models.Task.uuid)
+    if status is not None:
+        stmt = stmt.where(models.Task.status == status)
+    return stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+async def _partitions(stmt):
+    # Сессия открывается внутри генератора: зависимость SessionDep закрывается
+    # раньше, чем StreamingResponse начнёт отдавать тело.
+    async with read_session_factory() as session:
+        result = await session.stream(stmt)
+        async for rows in result.partitions():
+            yield rows
+
+
+async def ndjson_chunks(stmt):
+    async for rows in _partitions(stmt):
+        yield "".join(
+            json.dumps(
+                {"uuid": uuid, "title": title, "description": description, "status": status.value},
+                ensure_ascii=False,
+            ) + "\n"
+            for uuid, title, description, status in rows
+        )
+
+
+async def csv_chunks(stmt):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue()
+    async for rows in _partitions(stmt):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows((uuid, title, description, status.value) for uuid, title, description, status in rows)
+        yield buffer.getvalue()
+
+
+EXPORT_WRITERS = {
+    "ndjson": ndjson_chunks,
+    "csv": csv_chunks,
+}
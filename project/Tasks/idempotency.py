@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import RedisError
+
+from config import settings
+from redis_client import redis
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_KEY_PREFIX = "idempotency:"
+
+_POLL_INTERVAL = 0.05
+
+# Запросы с одним ключом внутри воркера ждут общий future, а не опрашивают Redis.
+_in_flight: Dict[str, Tuple[str, asyncio.Task]] = {}
+
+
+def _json_response(body: bytes, replayed: bool = False) -> Response:
+    headers = {REPLAYED_HEADER: "true"} if replayed else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _fingerprint(request: Request) -> str:
+    return hashlib.sha256(await request.body()).hexdigest()
+
+
+def _replay(record: dict, fingerprint: str) -> Response:
+    if record["fingerprint"] != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request body")
+    return _json_response(record["body"].encode("utf-8"), replayed=True)
+
+
+async def _wait_for_record(redis_key: str) -> Optional[dict]:
+    """Ждёт, пока запрос с тем же ключом в другом воркере допишет ответ. None - ключ освободился."""
+    deadline = asyncio.get_running_loop().time() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        raw = await redis.get(redis_key)
+        if raw is None:
+            return None
+        record = json.loads(raw)
+        if record["state"] == "done":
+            return record
+        if asyncio.get_running_loop().time() >= deadline:
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"},
+            )
+        await asyncio.sleep(_POLL_INTERVAL)
+
+
+async def _acquire(redis_key: str, fingerprint: str) -> Optional[Response]:
+    """Занимает ключ в Redis. Если запрос с этим ключом уже выполнен, возвращает его ответ."""
+    while True:
+        pending = json.dumps({"state": "pending", "fingerprint": fingerprint})
+        if await redis.set(redis_key, pending, nx=True, ex=settings.IDEMPOTENCY_LOCK_SECONDS):
+            return None
+        record = await _wait_for_record(redis_key)
+        if record is not None:
+            return _replay(record, fingerprint)
+
+
+async def _execute(redis_key: str, fingerprint: str, handler: Callable[[], Awaitable[Any]]) -> Response:
+    try:
+        replayed = await _acquire(redis_key, fingerprint)
+    except RedisError:
+        # Ошибка Redis до вызова handler (SET NX или ожидание чужого ответа): выполняем без ключа.
+        # Ошибки самого handler сюда не попадают, иначе запись выполнилась бы дважды.
+        logger.warning("Idempotency store is unavailable, executing without it", exc_info=True)
+        return _json_response(orjson.dumps(jsonable_encoder(await handler())))
+    if replayed is not None:
+        return replayed
+
+    try:
+        result = await handler()
+    except BaseException:
+        # Ответ с ошибкой не сохраняется: повтор с тем же ключом выполнит запрос заново.
+        try:
+            await redis.delete(redis_key)
+        except RedisError:
+            logger.warning("Idempotency key was not released", exc_info=True)
+        raise
+    body = orjson.dumps(jsonable_encoder(result))
+    done = json.dumps({"state": "done", "fingerprint": fingerprint, "body": body.decode("utf-8")})
+    try:
+        await redis.set(redis_key, done, ex=settings.IDEMPOTENCY_TTL_SECONDS)
+    except RedisError:
+        logger.warning("Idempotent response was not stored", exc_info=True)
+    return _json_response(body)
+
+
+def _finished(redis_key: str, work: asyncio.Task) -> None:
+    if _in_flight.get(redis_key, (None, None))[1] is work:
+        del _in_flight[redis_key]
+    if not work.cancelled():
+        # Ожидающие получат ту же ошибку; без них исключение не должно попасть в лог как забытое.
+        work.exception()
+
+
+async def run_idempotent(
+    request: Request,
+    idempotency_key: Optional[str],
+    handler: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Выполняет handler не больше одного раза на Idempotency-Key в течение IDEMPOTENCY_TTL_SECONDS.
+
+    Повтор получает сохранённый ответ, параллельный запрос с тем же ключом ждёт первый.
+    Тот же ключ с другим телом запроса - 422. Без заголовка или при недоступном Redis
+    handler просто выполняется.
+    """
+    if idempotency_key is None:
+        return await handler()
+
+    redis_key = f"{IDEMPOTENCY_KEY_PREFIX}{request.method}:{request.url.path}:{idempotency_key}"
+    fingerprint = await _fingerprint(request)
+
+    in_flight = _in_flight.get(redis_key)
+    if in_flight is not None:
+        fingerprint_in_flight, work = in_flight
+        response = await asyncio.shield(work)
+        return _replay({"fingerprint": fingerprint_in_flight, "body": response.body.decode("utf-8")}, fingerprint)
+
+    # Запрос выполняется в отдельной задаче: если первый клиент отключится, запись всё равно
+    # доведётся до конца, и ожидающие с тем же ключом получат её ответ, а не CancelledError.
+    work = asyncio.ensure_future(_execute(redis_key, fingerprint, handler))
+    _in_flight[redis_key] = (fingerprint, work)
+    work.add_done_callback(lambda done: _finished(redis_key, done))
+    return await asyncio.shield(work)
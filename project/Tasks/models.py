@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Text, Enum
+from sqlalchemy import String, Text, Enum, Index, Integer, BigInteger
 import uuid
+from typing import Optional
 from enum import Enum as PyEnum
 from Users.models import Base
 
@@ -13,11 +14,48 @@ class TaskStatus(PyEnum):
 
 class Task(Base):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Keyset-пагинация идёт по uuid, фильтр по статусу должен попадать в тот же порядок.
+        Index('ix_tasks_status_uuid', 'status', 'uuid'),
+        # varchar_pattern_ops нужен Postgres, чтобы LIKE 'prefix%' шёл по индексу при любой collation.
+        Index('ix_tasks_title', 'title', postgresql_ops={'title': 'varchar_pattern_ops'}),
+        Index('ix_tasks_fts_rowid', 'fts_rowid', unique=True),
+    )
 
     uuid: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title: Mapped[str] = mapped_column(String(100), nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=True)
     status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), default=TaskStatus.CREATED)
+    # Увеличивается при каждом изменении задачи, из него строится ETag.
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default='1')
+    # Ключ строки в полнотекстовом индексе SQLite (заполняет триггер tasks_fts_ai). Неявный rowid
+    # не подходит: у таблицы с TEXT-первичным ключом VACUUM может его перенумеровать.
+    fts_rowid: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 
     def __repr__(self):
         return f"<Task(title={self.title}, status={self.status}, id={self.id})>"
+
+
+class TaskCounter(Base):
+    """Именованные счётчики по таблице задач (например, общая версия таблицы для ETag списка)."""
+    __tablename__ = 'task_counters'
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, default=0, server_default='0')
+
+    def __repr__(self):
+        return f"<TaskCounter(name={self.name}, value={self.value})>"
+
+
+class TaskCounterDelta(Base):
+    """Приращения счётчиков в Postgres: каждая запись добавляет строку вместо UPDATE общей строки
+    task_counters, поэтому параллельные транзакции не ждут блокировку одной строки.
+    Фоновая задача периодически сворачивает приращения в task_counters."""
+    __tablename__ = 'task_counter_deltas'
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(50), index=True)
+    delta: Mapped[int] = mapped_column(BigInteger)
+
+    def __repr__(self):
+        return f"<TaskCounterDelta(name={self.name}, delta={self.delta})>"
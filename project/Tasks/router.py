@@ -1,24 +1,33 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, insert, update, delete, bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
-from database import async_session_factory
-from typing import List, Annotated
+from config import settings
+from database import SessionDep, run_write
+from typing import List, Literal, Optional, Set
+from collections import defaultdict
+import json
+import uuid
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from JWT.router import check_access_token
 
 from . import schemas, models
+from .conditional import ETAG_HEADER, task_etag, list_etag, etag_matches, parse_if_match, not_modified
+from .counters import (
+    TABLE_VERSION, get_counter, bump_table_version,
+    status_deltas, bump_status_counters, get_status_counts, reset_status_counters,
+)
+from .cache import cache_stats, get_cached_task, cache_task, invalidate_tasks, invalidate_deleted, invalidate_all
+from .export import EXPORT_MEDIA_TYPES, EXPORT_WRITERS, export_statement
+from .search import search_statement
+from .serialization import TASK_FIELDS, parse_fields, task_columns, dump_task, dump_tasks, pick_fields, json_response
+from .idempotency import run_idempotent
+from .events import EventsUnavailable, is_event_id, iter_events, publish_events, task_event
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
 
 http_bearer = HTTPBearer()
 
 
-async def get_session_local():
-    async with async_session_factory() as session:
-        yield session
-
-
-SessionDep = Annotated[AsyncSession, Depends(get_session_local)]
-
-
 async def check_token(creds: HTTPAuthorizationCredentials = Depends(http_bearer)):
     token = creds.credentials
     if not await check_access_token(token):
@@ -31,65 +40,543 @@ task_router = APIRouter()
 
 
 @task_router.get("/", response_model=List[schemas.TaskOut], summary="Получить все задачи")
-async def get_tasks(db: SessionDep):
-    result = await db.execute(select(models.Task))
-    tasks = result.scalars().all()
+async def get_tasks(
+    db: SessionDep,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы; без limit и cursor - все задачи"),
+    cursor: Optional[str] = Query(None, description="Значение заголовка X-Next-Cursor из предыдущего ответа"),
+    status: Optional[schemas.TaskStatus] = None,
+    title_prefix: Optional[str] = Query(None, min_length=1, max_length=100),
+    fields: Optional[str] = Query(None, description="Только эти поля через запятую, например uuid,status"),
+    if_none_match: Optional[str] = Header(None),
+):
+    selected = parse_fields(fields)
+    # Без limit и cursor список отдаётся целиком, как до появления пагинации.
+    if limit is None and cursor is not None:
+        limit = DEFAULT_PAGE_SIZE
+    # Проверка по версии таблицы - один lookup по первичному ключу вместо выборки страницы.
+    etag = list_etag(await get_counter(db, TABLE_VERSION), str(request.url.query))
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    # Кортежи вместо ORM-объектов и orjson вместо валидации response_model: для ?fields=
+    # (читаются только нужные колонки, uuid - ради курсора) и в быстром режиме.
+    if selected is None and settings.TASK_FAST_JSON:
+        selected = TASK_FIELDS
+    stmt = select(*task_columns(selected, "uuid")) if selected else select(models.Task)
+    stmt = stmt.order_by(models.Task.uuid)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    if status is not None:
+        stmt = stmt.where(models.Task.status == models.TaskStatus(status.value))
+    if title_prefix is not None:
+        if db.bind.dialect.name == "postgresql":
+            stmt = stmt.where(models.Task.title.startswith(title_prefix, autoescape=True))
+        else:
+            # В SQLite LIKE регистронезависим и индекс не использует, поэтому диапазон.
+            stmt = stmt.where(models.Task.title >= title_prefix, models.Task.title < title_prefix + "\U0010ffff")
+    if cursor is not None:
+        after = decode_cursor(cursor).get("uuid")
+        if not isinstance(after, str):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(models.Task.uuid > after)
+
+    result = await db.execute(stmt)
+    tasks = result.all() if selected else result.scalars().all()
+    if limit is not None and len(tasks) > limit:
+        tasks = tasks[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"uuid": tasks[-1].uuid})
+    response.headers[ETAG_HEADER] = etag
+    if selected:
+        return json_response(dump_tasks(tasks, selected), response.headers)
+    return tasks
+
+
+@task_router.get("/export", summary="Выгрузить все задачи потоком (NDJSON или CSV)")
+async def export_tasks(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    status: Optional[schemas.TaskStatus] = None,
+):
+    stmt = export_statement(models.TaskStatus(status.value) if status is not None else None)
+    return StreamingResponse(
+        EXPORT_WRITERS[format](stmt),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+
+@task_router.get("/search", response_model=List[schemas.TaskOut], summary="Полнотекстовый поиск по title и description")
+async def search_tasks(
+    db: SessionDep,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Значение заголовка X-Next-Cursor из предыдущего ответа"),
+    fields: Optional[str] = Query(None, description="Только эти поля через запятую, например uuid,status"),
+):
+    selected = parse_fields(fields)
+    offset = 0
+    if cursor is not None:
+        offset = decode_cursor(cursor).get("offset")
+        if not isinstance(offset, int) or offset < 0:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if selected is None and settings.TASK_FAST_JSON:
+        selected = TASK_FIELDS
+    columns = task_columns(selected) if selected else (models.Task,)
+    stmt = search_statement(db.bind.dialect.name, q, limit + 1, offset, columns)
+    if stmt is None:
+        return []
+    result = await db.execute(stmt)
+    tasks = result.all() if selected else result.scalars().all()
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"offset": offset + limit})
+    if selected:
+        return json_response(dump_tasks(tasks, selected), response.headers)
     return tasks
 
 
+EVENTS_DISABLED = "Task events are disabled"
+
+
+def _check_offset(offset: Optional[str]) -> Optional[str]:
+    if not settings.TASK_EVENTS_ENABLED:
+        raise HTTPException(status_code=404, detail=EVENTS_DISABLED)
+    if offset is not None and not is_event_id(offset):
+        raise HTTPException(status_code=400, detail="Invalid offset")
+    return offset
+
+
+@task_router.get("/stream", summary="Поток изменений задач (Server-Sent Events)")
+async def stream_task_events(
+    offset: Optional[str] = Query(None, description="id последнего полученного события"),
+    last_event_id: Optional[str] = Header(None),
+):
+    # Браузерный EventSource при переподключении сам присылает Last-Event-ID.
+    offset = _check_offset(last_event_id or offset)
+
+    async def sse():
+        yield "retry: 3000\n\n"
+        try:
+            async for event in iter_events(offset):
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                event_id, payload = event
+                yield f"id: {event_id}\ndata: {payload}\n\n"
+        except EventsUnavailable:
+            # Поток просто заканчивается: EventSource переподключится через retry с Last-Event-ID.
+            return
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@task_router.websocket("/stream")
+async def stream_task_events_ws(websocket: WebSocket, offset: Optional[str] = None):
+    if not settings.TASK_EVENTS_ENABLED:
+        await websocket.close(code=1008, reason=EVENTS_DISABLED)
+        return
+    if offset is not None and not is_event_id(offset):
+        await websocket.close(code=1008, reason="Invalid offset")
+        return
+    await websocket.accept()
+    try:
+        async for event in iter_events(offset):
+            if event is None:
+                continue
+            event_id, payload = event
+            await websocket.send_text(f'{{"id": "{event_id}", "event": {payload}}}')
+        # Клиент не успевал читать: закрываем, он переподключится с последним id.
+        await websocket.close(code=1013, reason="Slow consumer")
+    except EventsUnavailable:
+        await websocket.close(code=1013, reason="Events unavailable")
+    except WebSocketDisconnect:
+        pass
+
+
+@task_router.get("/stats", summary="Количество задач по статусам")
+async def get_task_stats(db: SessionDep):
+    counts = await get_status_counts(db)
+    return {**counts, "total": sum(counts.values())}
+
+
+@task_router.get("/cache/stats", summary="Статистика кэша задач")
+async def get_cache_stats():
+    return cache_stats()
+
+
 @task_router.get("/{task_id}", response_model=schemas.TaskOut, summary="Получить конкретную задачу")
-async def get_task(task_id: str, db: SessionDep):
+async def get_task(
+    task_id: str,
+    db: SessionDep,
+    fields: Optional[str] = Query(None, description="Только эти поля через запятую, например uuid,status"),
+    if_none_match: Optional[str] = Header(None),
+):
+    selected = parse_fields(fields)
+    payload, cache_epoch = await get_cached_task(task_id)
+    cached = json.loads(payload) if payload is not None else None
+    version = cached.get("version") if cached is not None else None
+    task = None
+    if version is None:
+        # В кэш кладётся только полное представление, частичное читается прямо из нужных колонок.
+        columns = selected or (TASK_FIELDS if settings.TASK_FAST_JSON else None)
+        stmt = select(*task_columns(columns, "version")) if columns else select(models.Task)
+        result = await db.execute(stmt.where(models.Task.uuid == task_id))
+        task = result.one_or_none() if columns else result.scalar_one_or_none()
+        if task is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        version = task.version
+
+    etag = task_etag(version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    if task is None:
+        if selected is not None:
+            payload = pick_fields(cached, selected)
+    elif columns:
+        payload = dump_task(task, columns)
+        if selected is None:
+            await cache_task(task_id, payload.decode(), version, cache_epoch)
+    else:
+        payload = schemas.TaskOut.model_validate(task).model_dump_json()
+        await cache_task(task_id, payload, version, cache_epoch)
+    return Response(content=payload, media_type="application/json", headers={ETAG_HEADER: etag})
+
+
+@task_router.post("/", response_model=schemas.TaskOut, summary="Создать новуюю задачу")
+async def create_task(
+    task: schemas.TaskCreate,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+):
+    return await run_idempotent(request, idempotency_key, lambda: _create_task(task))
+
+
+async def _create_task(task: schemas.TaskCreate):
+    async def write(db: AsyncSession):
+        # INSERT ... RETURNING: значения по умолчанию (uuid, version) приходят тем же запросом.
+        result = await db.execute(insert(models.Task).values(**task.model_dump()).returning(models.Task))
+        db_task = result.scalar_one()
+        await bump_table_version(db)
+        await bump_status_counters(db, status_deltas(added=[db_task.status]))
+        return schemas.TaskOut.model_validate(db_task)
+
+    created = await run_write(write)
+    await publish_events(task_event("created", created.model_dump(mode="json")))
+    return created
+
+
+def _bulk_row(task: schemas.TaskCreate) -> dict:
+    values = task.model_dump()
+    values["uuid"] = str(uuid.uuid4())
+    values["status"] = models.TaskStatus(values["status"] or models.TaskStatus.CREATED)
+    return values
+
+
+@task_router.post("/bulk", response_model=List[schemas.TaskBulkResult], summary="Создать пачку задач")
+async def create_tasks_bulk(
+    tasks: schemas.TaskBulkCreateBody,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+):
+    return await run_idempotent(request, idempotency_key, lambda: _create_tasks_bulk(tasks))
+
+
+async def _create_tasks_bulk(tasks: schemas.TaskBulkCreateBody):
+    rows = [_bulk_row(task) for task in tasks]
+
+    async def write(db: AsyncSession):
+        await db.execute(insert(models.Task), rows)
+        await bump_table_version(db)
+        await bump_status_counters(db, status_deltas(added=[row["status"] for row in rows]))
+
+    await run_write(write)
+    await publish_events(*(
+        task_event("created", schemas.TaskOut(**row, version=1).model_dump(mode="json")) for row in rows
+    ))
+    return [
+        schemas.TaskBulkResult(index=index, uuid=row["uuid"], result="created")
+        for index, row in enumerate(rows)
+    ]
+
+
+@task_router.put("/bulk", response_model=List[schemas.TaskBulkResult], summary="Изменить пачку задач")
+async def update_tasks_bulk(
+    tasks: schemas.TaskBulkUpdateBody,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+):
+    return await run_idempotent(request, idempotency_key, lambda: _update_tasks_bulk(tasks))
+
+
+async def _update_tasks_bulk(tasks: schemas.TaskBulkUpdateBody):
+    async def write(db: AsyncSession):
+        uuids = {task.uuid for task in tasks}
+        result = await db.execute(
+            select(models.Task.uuid, models.Task.status).where(models.Task.uuid.in_(uuids)).with_for_update()
+        )
+        statuses = dict(result.all())
+        existing = set(statuses)
+
+        # Элементы с одинаковым набором полей идут одним executemany; групп не больше,
+        # чем комбинаций полей TaskUpdate.
+        groups = defaultdict(list)
+        added, removed = [], []
+        for task in tasks:
+            if task.uuid not in existing:
+                continue
+            values = task.model_dump(exclude_unset=True, exclude={"uuid"})
+            if "status" in values:
+                added.append(values["status"])
+                removed.append(statuses[task.uuid])
+                statuses[task.uuid] = values["status"]
+            if values:
+                groups[tuple(sorted(values))].append(
+                    {"task_uuid": task.uuid, **{f"new_{field}": value for field, value in values.items()}}
+                )
+
+        table = models.Task.__table__
+        for fields, params in groups.items():
+            stmt = (
+                update(table)
+                .where(table.c.uuid == bindparam("task_uuid"))
+                .values({
+                    **{field: bindparam(f"new_{field}") for field in fields},
+                    "version": table.c.version + 1,
+                })
+            )
+            await db.execute(stmt, params)
+        updated = [param["task_uuid"] for params in groups.values() for param in params]
+        rows = {}
+        if updated:
+            await bump_table_version(db)
+            await bump_status_counters(db, status_deltas(added, removed))
+            # executemany не возвращает строки: новые версии нужны кэшу, полные строки - событиям,
+            # как у одиночного PUT/PATCH.
+            result = await db.scalars(select(models.Task).where(models.Task.uuid.in_(updated)))
+            rows = {task.uuid: schemas.TaskOut.model_validate(task) for task in result}
+        return existing, rows
+
+    existing, rows = await run_write(write)
+    await invalidate_tasks({task_id: task.version for task_id, task in rows.items()})
+    # Одно событие на задачу с её итоговым состоянием, в порядке первого упоминания в пачке.
+    await publish_events(*(
+        task_event("updated", rows[task_id].model_dump(mode="json"))
+        for task_id in dict.fromkeys(task.uuid for task in tasks)
+        if task_id in rows
+    ))
+
+    return [
+        schemas.TaskBulkResult(
+            index=index,
+            uuid=task.uuid,
+            result="updated" if task.uuid in existing else "not_found",
+        )
+        for index, task in enumerate(tasks)
+    ]
+
+
+@task_router.delete("/bulk", response_model=List[schemas.TaskBulkResult], summary="Удалить пачку задач")
+async def delete_tasks_bulk(
+    task_ids: schemas.TaskBulkDeleteBody,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+):
+    return await run_idempotent(request, idempotency_key, lambda: _delete_tasks_bulk(task_ids))
+
+
+async def _delete_tasks_bulk(task_ids: schemas.TaskBulkDeleteBody):
+    async def write(db: AsyncSession):
+        result = await db.execute(
+            delete(models.Task)
+            .where(models.Task.uuid.in_(set(task_ids)))
+            .returning(models.Task.uuid, models.Task.status)
+        )
+        rows = result.all()
+        if rows:
+            await bump_table_version(db)
+            await bump_status_counters(db, status_deltas(removed=[row.status for row in rows]))
+        return {row.uuid for row in rows}
+
+    deleted = await run_write(write)
+    await invalidate_deleted(*deleted)
+    await publish_events(*(task_event("deleted", {"uuid": task_id}) for task_id in deleted))
+    return [
+        schemas.TaskBulkResult(
+            index=index,
+            uuid=task_id,
+            result="deleted" if task_id in deleted else "not_found",
+        )
+        for index, task_id in enumerate(task_ids)
+    ]
+
+
+def _version_conflict(current_version: int, allowed_versions: Optional[Set[int]]) -> HTTPException:
+    if allowed_versions is not None and current_version not in allowed_versions:
+        return HTTPException(
+            status_code=412,
+            detail="Task was modified",
+            headers={ETAG_HEADER: task_etag(current_version)},
+        )
+    return HTTPException(
+        status_code=409,
+        detail=f"Version conflict: current version is {current_version}",
+        headers={ETAG_HEADER: task_etag(current_version)},
+    )
+
+
+async def _update_task_row(
+    db: AsyncSession,
+    task_id: str,
+    update_data: dict,
+    if_match: Optional[str] = None,
+    expected_version: Optional[int] = None,
+) -> schemas.TaskOut:
+    """Обновляет задачу одним UPDATE ... RETURNING, проверяя версию в том же запросе."""
+    stmt = (
+        update(models.Task)
+        .where(models.Task.uuid == task_id)
+        .values(**update_data, version=models.Task.version + 1)
+    )
+    if "status" in update_data:
+        # Старый статус для счётчиков возвращает тот же UPDATE. CTE читает строку до изменения:
+        # в Postgres FOR UPDATE блокирует её до конца транзакции, а SQLite материализует CTE
+        # один раз при первом обращении - в WHERE, то есть до записи.
+        old = (
+            select(models.Task.uuid, models.Task.status)
+            .where(models.Task.uuid == task_id)
+            .with_for_update()
+            .cte("old_task")
+            .prefix_with("MATERIALIZED")
+        )
+        stmt = stmt.add_cte(old).where(models.Task.uuid.in_(select(old.c.uuid))).returning(
+            models.Task, select(old.c.status).scalar_subquery().label("old_status")
+        )
+    else:
+        stmt = stmt.returning(models.Task)
+    allowed_versions = parse_if_match(if_match)
+    if allowed_versions is not None:
+        stmt = stmt.where(models.Task.version.in_(allowed_versions))
+    if expected_version is not None:
+        stmt = stmt.where(models.Task.version == expected_version)
+
+    result = await db.execute(stmt)
+    row = result.one_or_none()
+    if row is None:
+        # Второй запрос нужен только при неудаче, чтобы отличить 404 от конфликта версий.
+        result = await db.execute(select(models.Task.version).where(models.Task.uuid == task_id))
+        current_version = result.scalar_one_or_none()
+        if current_version is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        raise _version_conflict(current_version, allowed_versions)
+
+    db_task = row[0]
+    await bump_table_version(db)
+    if "status" in update_data:
+        await bump_status_counters(db, status_deltas(added=[db_task.status], removed=[row.old_status]))
+    return schemas.TaskOut.model_validate(db_task)
+
+
+async def _read_unchanged_task(
+    db: AsyncSession,
+    task_id: str,
+    if_match: Optional[str] = None,
+    expected_version: Optional[int] = None,
+) -> schemas.TaskOut:
+    """PUT/PATCH без полей ничего не пишет, но проверяет те же условия, что и запись."""
     result = await db.execute(select(models.Task).where(models.Task.uuid == task_id))
     task = result.scalar_one_or_none()
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    allowed_versions = parse_if_match(if_match)
+    if (allowed_versions is not None and task.version not in allowed_versions) or (
+        expected_version is not None and task.version != expected_version
+    ):
+        raise _version_conflict(task.version, allowed_versions)
+    return schemas.TaskOut.model_validate(task)
 
 
-@task_router.post("/", response_model=schemas.TaskOut, summary="Создать новуюю задачу")
-async def create_task(task: schemas.TaskCreate, db: SessionDep):
-    db_task = models.Task(**task.model_dump())
-    db.add(db_task)
-    await db.commit()
-    await db.refresh(db_task)
-    return db_task
+async def _apply_task_update(db: AsyncSession, task_id: str, update_data: dict, if_match: Optional[str] = None,
+                             expected_version: Optional[int] = None) -> Response:
+    if not update_data:
+        # Версия, ETag и кэш остаются прежними: изменять нечего.
+        task = await _read_unchanged_task(db, task_id, if_match, expected_version)
+    else:
+        async def write(db: AsyncSession):
+            return await _update_task_row(db, task_id, update_data, if_match, expected_version)
+
+        task = await run_write(write)
+        await invalidate_tasks({task_id: task.version})
+        await publish_events(task_event("updated", task.model_dump(mode="json")))
+    return Response(
+        content=task.model_dump_json(),
+        media_type="application/json",
+        headers={ETAG_HEADER: task_etag(task.version)},
+    )
 
 
 @task_router.put("/{task_id}", response_model=schemas.TaskOut, summary="Изменить конкретную задачу")
-async def update_task(task_id: str, task_update: schemas.TaskUpdate, db: SessionDep):
-    result = await db.execute(select(models.Task).where(models.Task.uuid == task_id))
-    db_task = result.scalar_one_or_none()
-    if db_task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
+async def update_task(
+    task_id: str,
+    task_update: schemas.TaskUpdate,
+    db: SessionDep,
+    if_match: Optional[str] = Header(None),
+):
+    return await _apply_task_update(db, task_id, task_update.model_dump(exclude_unset=True), if_match)
 
-    update_data = task_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_task, field, value)
 
-    await db.commit()
-    await db.refresh(db_task)
-    return db_task
+@task_router.patch("/{task_id}", response_model=schemas.TaskOut, summary="Частично изменить задачу")
+async def patch_task(
+    task_id: str,
+    task_patch: schemas.TaskPatch,
+    db: SessionDep,
+    if_match: Optional[str] = Header(None),
+):
+    update_data = task_patch.model_dump(exclude_unset=True)
+    expected_version = update_data.pop("version", None)
+    return await _apply_task_update(db, task_id, update_data, if_match, expected_version)
 
 
 @task_router.delete("/{task_id}", summary="Удалить конкретную задачу")
-async def delete_task(task_id: str, db: SessionDep):
-    result = await db.execute(select(models.Task).where(models.Task.uuid == task_id))
-    db_task = result.scalar_one_or_none()
-    if db_task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
+async def delete_task(task_id: str):
+    async def write(db: AsyncSession):
+        result = await db.execute(
+            delete(models.Task).where(models.Task.uuid == task_id).returning(models.Task.status)
+        )
+        row = result.one_or_none()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        await bump_table_version(db)
+        await bump_status_counters(db, status_deltas(removed=[row.status]))
 
-    await db.delete(db_task)
-    await db.commit()
+    await run_write(write)
+    await invalidate_deleted(task_id)
+    await publish_events(task_event("deleted", {"uuid": task_id}))
     return {"message": "Task deleted successfully"}
 
 
-@task_router.delete("_delete_all", summary="Удалить ВСЕ задачи")
-async def delete_task_all(db: SessionDep):
-    result = await db.execute(select(models.Task))
-    db_task = result.scalars().all()
-    if not db_task:
-        return {"message": "Tasks deleted successfully"}
-    for i in db_task:
-        await db.delete(i)
-    await db.commit()
-    return {"message": "Tasks deleted successfully"}
+@task_router.delete("_delete_all", summary="Удалить ВСЕ задачи (или все задачи в указанном статусе)")
+async def delete_task_all(status: Optional[schemas.TaskStatus] = None):
+    stmt = delete(models.Task)
+    if status is not None:
+        stmt = stmt.where(models.Task.status == models.TaskStatus(status.value))
+
+    async def write(db: AsyncSession):
+        result = await db.execute(stmt)
+        if result.rowcount:
+            await bump_table_version(db)
+            await reset_status_counters(db, models.TaskStatus(status.value) if status is not None else None)
+        return result.rowcount
+
+    deleted = await run_write(write)
+    await invalidate_all()
+    if deleted:
+        await publish_events(task_event("cleared", {"status": status.value if status else None}))
+    return {"message": "Tasks deleted successfully", "deleted": deleted}
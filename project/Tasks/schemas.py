@@ -1,7 +1,9 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, List, Literal, Optional
 from enum import Enum
 
+BULK_MAX_ITEMS = 5000
+
 
 class TaskStatus(str, Enum):
     CREATED = "CREATED"
@@ -24,9 +26,39 @@ class TaskUpdate(BaseModel):
     description: Optional[str] = None
     status: Optional[TaskStatus] = None
 
+    @field_validator("title", "status")
+    @classmethod
+    def not_null(cls, value):
+        # Поле можно не передавать, но null в NOT NULL колонку - ошибка запроса (422),
+        # а не IntegrityError посреди записи, которая уронила бы всю пачку.
+        if value is None:
+            raise ValueError("must not be null")
+        return value
+
+
+class TaskPatch(TaskUpdate):
+    # Ожидаемая версия задачи; при расхождении PATCH отвечает 409.
+    version: Optional[int] = None
+
 
 class TaskOut(TaskBase):
     uuid: str
+    version: int
 
     class Config:
         from_attributes = True
+
+
+class TaskBulkUpdate(TaskUpdate):
+    uuid: str
+
+
+class TaskBulkResult(BaseModel):
+    index: int
+    uuid: str
+    result: Literal["created", "updated", "deleted", "not_found"]
+
+
+TaskBulkCreateBody = Annotated[List[TaskCreate], Field(min_length=1, max_length=BULK_MAX_ITEMS)]
+TaskBulkUpdateBody = Annotated[List[TaskBulkUpdate], Field(min_length=1, max_length=BULK_MAX_ITEMS)]
+TaskBulkDeleteBody = Annotated[List[str], Field(min_length=1, max_length=BULK_MAX_ITEMS)]
@@ -0,0 +1,79 @@
+import re
+from typing import Optional
+
+from sqlalchemy import DDL, column, event, func, literal_column, select, table
+
+from . import models
+
+# SQLite: внешнее FTS5-содержимое поверх tasks, связка по явной колонке fts_rowid, а не по rowid:
+# VACUUM может перенумеровать rowid у таблицы без INTEGER PRIMARY KEY, и индекс разошёлся бы с данными.
+# Номер выдаёт триггер вставки. Миграция, пересоздающая tasks через batch_alter_table, теряет
+# триггеры, поэтому должна создать их заново и выполнить INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild').
+SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+    "title, description, content='tasks', content_rowid='fts_rowid', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    "UPDATE tasks SET fts_rowid = (SELECT coalesce(max(fts_rowid), 0) + 1 FROM tasks) "
+    "WHERE uuid = new.uuid AND fts_rowid IS NULL; "
+    "INSERT INTO tasks_fts(rowid, title, description) "
+    "SELECT fts_rowid, title, description FROM tasks WHERE uuid = new.uuid; END",
+    "CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.fts_rowid, old.title, old.description); END",
+    "CREATE TRIGGER tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+    "VALUES ('delete', old.fts_rowid, old.title, old.description); "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.fts_rowid, new.title, new.description); END",
+)
+
+# Postgres: GIN по выражению. Запрос должен повторять выражение дословно, иначе индекс не подхватится.
+POSTGRES_TSVECTOR = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))"
+POSTGRES_FTS_DDL = (
+    f"CREATE INDEX ix_tasks_fts ON tasks USING gin ({POSTGRES_TSVECTOR})",
+)
+
+for statement in SQLITE_FTS_DDL:
+    event.listen(models.Task.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_FTS_DDL:
+    event.listen(models.Task.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(models.Task.__table__, "before_drop", DDL("DROP TABLE IF EXISTS tasks_fts").execute_if(dialect="sqlite"))
+
+tasks_fts = table("tasks_fts", column("rowid"), column("rank"))
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def fts5_query(q: str) -> Optional[str]:
+    """Переводит пользовательскую строку в запрос FTS5: все слова обязательны, последнее - по префиксу.
+
+    Каждое слово берётся в кавычки, поэтому операторы FTS5 из ввода не интерпретируются.
+    """
+    terms = _TERM.findall(q)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"' for term in terms) + "*"
+
+
+def search_statement(dialect: str, q: str, limit: int, offset: int, columns=(models.Task,)):
+    if dialect == "postgresql":
+        tsvector = literal_column(POSTGRES_TSVECTOR)
+        tsquery = func.websearch_to_tsquery("simple", q)
+        return (
+            select(*columns)
+            .where(tsvector.op("@@")(tsquery))
+            .order_by(func.ts_rank(tsvector, tsquery).desc(), models.Task.uuid)
+            .limit(limit)
+            .offset(offset)
+        )
+
+    match = fts5_query(q)
+    if match is None:
+        return None
+    return (
+        select(*columns)
+        .join(tasks_fts, tasks_fts.c.rowid == models.Task.fts_rowid)
+        .where(literal_column("tasks_fts").op("MATCH")(match))
+        .order_by(tasks_fts.c.rank, models.Task.uuid)
+        .limit(limit)
+        .offset(offset)
+    )
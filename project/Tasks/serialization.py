@@ -0,0 +1,50 @@
+from typing import Iterable, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException, Response
+
+from . import models
+
+# Поля TaskOut в том же порядке, что и в обычном ответе через response_model.
+TASK_FIELDS = ("title", "description", "status", "uuid", "version")
+TASK_COLUMNS = tuple(getattr(models.Task, field) for field in TASK_FIELDS)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Разбирает ?fields=uuid,status; None - нужны все поля. Порядок полей - как в TaskOut."""
+    if fields is None:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(TASK_FIELDS)
+    if not requested or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}" if unknown else "No fields requested",
+        )
+    return tuple(field for field in TASK_FIELDS if field in requested)
+
+
+def task_columns(fields: Sequence[str], *required: str) -> tuple:
+    """Колонки для select: запрошенные поля, затем служебные (нужные для курсора или ETag).
+
+    Служебные идут в конце, поэтому dump_task(s) с тем же fields их не выводит.
+    """
+    names = tuple(fields) + tuple(name for name in required if name not in fields)
+    return tuple(getattr(models.Task, name) for name in names)
+
+
+def dump_task(row: Sequence, fields: Sequence[str] = TASK_FIELDS) -> bytes:
+    """Кодирует строку-кортеж из select(*task_columns(fields)) без ORM-объекта и валидации TaskOut."""
+    return orjson.dumps(dict(zip(fields, row)))
+
+
+def dump_tasks(rows: Iterable[Sequence], fields: Sequence[str] = TASK_FIELDS) -> bytes:
+    return orjson.dumps([dict(zip(fields, row)) for row in rows])
+
+
+def pick_fields(task: dict, fields: Sequence[str]) -> bytes:
+    return orjson.dumps({field: task[field] for field in fields})
+
+
+def json_response(content: bytes, headers=None) -> Response:
+    return Response(content=content, media_type="application/json", headers=headers)
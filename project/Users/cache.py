@@ -0,0 +1,68 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from config import settings
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Снимок строки users: атрибуты те же, что у модели, но без привязки к сессии."""
+    id: int
+    username: str
+    hashed_password: str
+
+
+class UserCache:
+    """LRU пользователей по username с TTL; индекс по id нужен для инвалидации после записи.
+
+    Кэш живёт в процессе. Устаревание между воркерами ограничено TTL: единственное изменение
+    пользователя - перехеширование пароля, а старый хеш проверяет тот же пароль.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, CachedUser]] = OrderedDict()
+        self._usernames: Dict[int, str] = {}
+
+    def get(self, username: str) -> Optional[CachedUser]:
+        entry = self._entries.get(username)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at <= time.time():
+            self._remove(username)
+            return None
+        self._entries.move_to_end(username)
+        return user
+
+    def put(self, user: CachedUser) -> None:
+        self._entries[user.username] = (time.time() + self.ttl_seconds, user)
+        self._entries.move_to_end(user.username)
+        self._usernames[user.id] = user.username
+        while len(self._entries) > self.max_entries:
+            username, (_, evicted) = self._entries.popitem(last=False)
+            self._usernames.pop(evicted.id, None)
+
+    def invalidate(self, user_id: Optional[int] = None, username: Optional[str] = None) -> None:
+        if user_id is not None:
+            username = self._usernames.get(user_id, username)
+        if username is not None:
+            self._remove(username)
+
+    def _remove(self, username: str) -> None:
+        entry = self._entries.pop(username, None)
+        if entry is not None:
+            self._usernames.pop(entry[1].id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._usernames.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+user_cache = UserCache(settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS)
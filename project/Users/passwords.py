@@ -0,0 +1,114 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+import bcrypt
+from fastapi import HTTPException, status
+
+from config import settings
+from metrics import PASSWORD_HASH_DURATION
+
+
+@dataclass
+class PasswordHasherStats:
+    in_flight: int = 0
+    queued: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+
+
+stats = PasswordHasherStats()
+
+_executor: Optional[Executor] = None
+_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+
+
+def hasher_stats() -> dict:
+    return asdict(stats)
+
+
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="bcrypt",
+            )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def _release_slot(future: asyncio.Future) -> None:
+    stats.in_flight -= 1
+    # exception() заодно помечает ошибку полученной, если вызывающего уже отменили.
+    if future.cancelled() or future.exception() is not None:
+        stats.failed += 1
+    else:
+        stats.completed += 1
+    _slots.release()
+
+
+async def _run(fn, *args):
+    """Выполняет bcrypt в пуле, не блокируя event loop.
+
+    Одновременно считается не больше PASSWORD_HASH_WORKERS хешей; если очередь ожидающих
+    переполнена, запрос сразу получает 503, а не висит вместе со всеми остальными.
+    Слот освобождается, когда хеш досчитан в пуле, а не когда вызывающий перестал ждать:
+    отменённый запрос не останавливает bcrypt, и иначе лимит можно было бы превысить.
+    """
+    if _slots.locked() and stats.queued >= settings.PASSWORD_HASH_MAX_QUEUE:
+        stats.rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервер перегружен, повторите запрос позже",
+            headers={"Retry-After": "1"},
+        )
+
+    stats.queued += 1
+    try:
+        await _slots.acquire()
+    finally:
+        stats.queued -= 1
+
+    try:
+        future = asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    stats.in_flight += 1
+    future.add_done_callback(_release_slot)
+    with PASSWORD_HASH_DURATION.labels(fn.__name__.strip("_")).time():
+        return await asyncio.shield(future)
+
+
+async def hash_password(password: str) -> str:
+    hashed_password = await _run(_hashpw, password.encode('utf-8'), settings.BCRYPT_ROUNDS)
+    return hashed_password.decode('utf-8')
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await _run(bcrypt.checkpw, password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    # Формат bcrypt: $2b$<cost>$<salt+hash>
+    try:
+        rounds = int(hashed_password.split('$')[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != settings.BCRYPT_ROUNDS
@@ -1,11 +1,18 @@
 # users_router.py
-from fastapi import APIRouter, Response, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Response, HTTPException, Depends
 from fastapi.security import HTTPBearer
 from .schemas import UsersAdd, UsersGet
 from .models import Users
-from sqlalchemy import select
-from database import async_session_factory
-import bcrypt
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import settings
+from database import SessionDep, run_write
+from .cache import CachedUser, user_cache
+from .passwords import hash_password
+from ratelimit import limit_route
 
 
 router = APIRouter()
@@ -14,37 +21,41 @@ router = APIRouter()
 http_bearer = HTTPBearer()
 
 
-async def get_user(username: str):
-    async with async_session_factory() as session:
-        stmt = select(Users).where(Users.username == username)
-        result = await session.execute(stmt)
-        return result.scalars().first()
-
-
-async def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed_password.decode('utf-8')
+async def get_user(db: AsyncSession, username: str) -> Optional[CachedUser]:
+    if settings.USER_CACHE_ENABLED:
+        user = user_cache.get(username)
+        if user is not None:
+            return user
 
+    result = await db.execute(select(Users.id, Users.username, Users.hashed_password).where(Users.username == username))
+    row = result.first()
+    if row is None:
+        return None
+    user = CachedUser(*row)
+    if settings.USER_CACHE_ENABLED:
+        user_cache.put(user)
+    return user
 
-@router.post("/register", summary='Регистрация пользователя')
-async def register_user(user: UsersAdd, response: Response):
-    async with async_session_factory() as session:
-        result = await session.execute(select(Users).filter(Users.username == user.username))
-        db_user = result.scalar_one_or_none()
 
-    if db_user:
+@router.post("/register", summary='Регистрация пользователя', dependencies=[Depends(limit_route("register"))])
+async def register_user(user: UsersAdd, response: Response, db: SessionDep):
+    # Проверка до bcrypt: занятое имя отклоняется без хеширования пароля.
+    if await get_user(db, user.username) is not None:
         raise HTTPException(status_code=400, detail="Пользователь с таким именем уже существует")
 
     hashed_password = await hash_password(user.password)
 
-    new_user = Users(username=user.username, hashed_password=hashed_password)
+    async def write(session: AsyncSession):
+        result = await session.execute(
+            insert(Users).values(username=user.username, hashed_password=hashed_password).returning(Users)
+        )
+        return UsersGet.model_validate(result.scalar_one(), from_attributes=True)
 
-    async with async_session_factory() as session:
-        session.add(new_user)
-        await session.commit()
-        await session.refresh(new_user)
-
-    pydant_return = UsersGet.model_validate(new_user, from_attributes=True)
+    try:
+        pydant_return = await run_write(write)
+    except IntegrityError:
+        # Имя успели занять параллельной регистрацией.
+        raise HTTPException(status_code=400, detail="Пользователь с таким именем уже существует")
+    user_cache.invalidate(username=user.username)
 
     return pydant_return
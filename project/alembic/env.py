@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 from Users.models import Base, Users
 from Tasks.models import Task, TaskStatus
+import Tasks.search  # noqa: F401 - DDL полнотекстового поиска для create_all
 from config import settings
 
 # this is the Alembic Config object, which provides
@@ -27,6 +28,17 @@ config.set_main_option("sqlalchemy.url", settings.DATABASE_URL_asyncpg)
 
 target_metadata = Base.metadata
 
+
+def include_name(name, type_, parent_names):
+    # Полнотекстовый индекс (FTS5 и его служебные таблицы, GIN по выражению в Postgres)
+    # создаётся миграцией вручную.
+    if type_ == "table" and name.startswith("tasks_fts"):
+        return False
+    if type_ == "index" and name == "ix_tasks_fts":
+        return False
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -51,6 +63,8 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=url.startswith("sqlite"),
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -58,7 +72,13 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    # SQLite не умеет большинство ALTER TABLE, для него autogenerate пишет batch-операции.
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=connection.dialect.name == "sqlite",
+        include_name=include_name,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
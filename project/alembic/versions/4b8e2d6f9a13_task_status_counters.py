@@ -0,0 +1,30 @@
+"""task status counters
+
+Revision ID: 4b8e2d6f9a13
+Revises: e7b3f08a4c21
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8e2d6f9a13'
+down_revision: Union[str, None] = 'e7b3f08a4c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Начальные значения счётчиков status:* по существующим задачам.
+    op.execute(
+        "INSERT INTO task_counters (name, value) "
+        "SELECT 'status:' || status, count(*) FROM tasks WHERE status IS NOT NULL GROUP BY status"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM task_counters WHERE name LIKE 'status:%'")
@@ -0,0 +1,94 @@
+"""task fts rowid
+
+Revision ID: 5e1a7c3b9d42
+Revises: 9d2c4f7e1b36
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1a7c3b9d42'
+down_revision: Union[str, None] = '9d2c4f7e1b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def drop_fts() -> None:
+    op.execute("DROP TRIGGER IF EXISTS tasks_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS tasks_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS tasks_fts_ai")
+    op.execute("DROP TABLE IF EXISTS tasks_fts")
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('fts_rowid', sa.Integer(), nullable=True))
+    if op.get_bind().dialect.name != 'sqlite':
+        op.create_index('ix_tasks_fts_rowid', 'tasks', ['fts_rowid'], unique=True)
+        return
+
+    # FTS5 связывался с tasks по неявному rowid, который VACUUM может перенумеровать.
+    # Существующие rowid уникальны, поэтому становятся начальными значениями явной колонки.
+    drop_fts()
+    op.execute("UPDATE tasks SET fts_rowid = rowid")
+    op.create_index('ix_tasks_fts_rowid', 'tasks', ['fts_rowid'], unique=True)
+    op.execute(
+        "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+        "title, description, content='tasks', content_rowid='fts_rowid', tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+        "UPDATE tasks SET fts_rowid = (SELECT coalesce(max(fts_rowid), 0) + 1 FROM tasks) "
+        "WHERE uuid = new.uuid AND fts_rowid IS NULL; "
+        "INSERT INTO tasks_fts(rowid, title, description) "
+        "SELECT fts_rowid, title, description FROM tasks WHERE uuid = new.uuid; END"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.fts_rowid, old.title, old.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.fts_rowid, old.title, old.description); "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.fts_rowid, new.title, new.description); END"
+    )
+    op.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        op.drop_index('ix_tasks_fts_rowid', table_name='tasks')
+        op.drop_column('tasks', 'fts_rowid')
+        return
+
+    # batch_alter_table пересоздаёт tasks и теряет триггеры, поэтому индекс строится заново после него.
+    drop_fts()
+    op.drop_index('ix_tasks_fts_rowid', table_name='tasks')
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('fts_rowid')
+    op.execute(
+        "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+        "title, description, content='tasks', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END"
+    )
+    op.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
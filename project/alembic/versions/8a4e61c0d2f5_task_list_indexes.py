@@ -0,0 +1,28 @@
+"""task list indexes
+
+Revision ID: 8a4e61c0d2f5
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-18 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4e61c0d2f5'
+down_revision: Union[str, None] = '3f1c2a9d7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_status_uuid', 'tasks', ['status', 'uuid'])
+    op.create_index('ix_tasks_title', 'tasks', ['title'], postgresql_ops={'title': 'varchar_pattern_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_title', table_name='tasks')
+    op.drop_index('ix_tasks_status_uuid', table_name='tasks')
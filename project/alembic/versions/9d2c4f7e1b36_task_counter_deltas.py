@@ -0,0 +1,44 @@
+"""task counter deltas
+
+Revision ID: 9d2c4f7e1b36
+Revises: 4b8e2d6f9a13
+Create Date: 2026-10-18 16:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2c4f7e1b36'
+down_revision: Union[str, None] = '4b8e2d6f9a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'task_counter_deltas',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('delta', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_task_counter_deltas_name', 'task_counter_deltas', ['name'])
+
+
+def downgrade() -> None:
+    # Несвёрнутые приращения переносятся в счётчики, чтобы значения не потерялись.
+    op.execute(
+        "INSERT INTO task_counters (name, value) SELECT DISTINCT name, 0 FROM task_counter_deltas "
+        "WHERE name NOT IN (SELECT name FROM task_counters)"
+    )
+    op.execute(
+        "UPDATE task_counters SET value = value + "
+        "(SELECT sum(delta) FROM task_counter_deltas WHERE task_counter_deltas.name = task_counters.name) "
+        "WHERE name IN (SELECT name FROM task_counter_deltas)"
+    )
+    op.drop_index('ix_task_counter_deltas_name', table_name='task_counter_deltas')
+    op.drop_table('task_counter_deltas')
@@ -0,0 +1,34 @@
+"""task version and counters
+
+Revision ID: c52d9e3b71a4
+Revises: 8a4e61c0d2f5
+Create Date: 2026-10-18 11:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52d9e3b71a4'
+down_revision: Union[str, None] = '8a4e61c0d2f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.create_table(
+        'task_counters',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('value', sa.BigInteger(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('task_counters')
+    with op.batch_alter_table('tasks') as batch_op:
+        batch_op.drop_column('version')
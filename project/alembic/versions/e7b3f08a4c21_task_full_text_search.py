@@ -0,0 +1,59 @@
+"""task full text search
+
+Revision ID: e7b3f08a4c21
+Revises: c52d9e3b71a4
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3f08a4c21'
+down_revision: Union[str, None] = 'c52d9e3b71a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "CREATE INDEX ix_tasks_fts ON tasks USING gin "
+            "(to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, '')))"
+        )
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+        "title, description, content='tasks', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) "
+        "VALUES ('delete', old.rowid, old.title, old.description); "
+        "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.rowid, new.title, new.description); END"
+    )
+    op.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_tasks_fts', table_name='tasks')
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS tasks_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS tasks_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS tasks_fts_ai")
+    op.execute("DROP TABLE IF EXISTS tasks_fts")
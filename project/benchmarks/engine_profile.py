@@ -0,0 +1,94 @@
+"""Сравнение пропускной способности SQLite с настройками по умолчанию и с профилем из config.Settings.
+
+Запуск из каталога project:
+
+    python -m benchmarks.engine_profile --workers 16 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database import build_async_engine, sqlite_pragmas
+from Users.models import Base
+from Tasks.models import Task, TaskStatus
+
+# Поведение SQLite «из коробки»: rollback journal и fsync на каждый коммит.
+DEFAULT_PRAGMAS = {"journal_mode": "DELETE", "synchronous": "FULL"}
+
+
+async def run_profile(name: str, pragmas: dict, args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = build_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}", pragmas)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+        session_factory = async_sessionmaker(engine)
+        uuids = [str(uuid.uuid4()) for _ in range(args.rows)]
+        async with session_factory() as session:
+            session.add_all(Task(uuid=task_id, title=f"Task {i}", description="x" * 200) for i, task_id in enumerate(uuids))
+            await session.commit()
+
+        counts = {"reads": 0, "writes": 0, "errors": 0}
+        deadline = time.perf_counter() + args.duration
+
+        async def worker():
+            rnd = random.Random()
+            while time.perf_counter() < deadline:
+                try:
+                    async with session_factory() as session:
+                        if rnd.random() < args.read_ratio:
+                            await session.execute(select(Task).where(Task.uuid == rnd.choice(uuids)))
+                            counts["reads"] += 1
+                        else:
+                            if rnd.random() < 0.5:
+                                session.add(Task(title="New task", status=TaskStatus.CREATED))
+                            else:
+                                await session.execute(
+                                    update(Task).where(Task.uuid == rnd.choice(uuids)).values(status=TaskStatus.IN_PROGRESS)
+                                )
+                            await session.commit()
+                            counts["writes"] += 1
+                except Exception:
+                    counts["errors"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.workers)))
+        elapsed = time.perf_counter() - started
+        await engine.dispose()
+
+    total = counts["reads"] + counts["writes"]
+    return {"profile": name, "pragmas": pragmas, **counts, "ops_per_second": round(total / elapsed, 1)}
+
+
+async def main(args):
+    results = [
+        await run_profile("default", DEFAULT_PRAGMAS, args),
+        await run_profile("tuned", sqlite_pragmas(), args),
+    ]
+    for result in results:
+        print(
+            f"{result['profile']:>8}: {result['ops_per_second']:>9} ops/s "
+            f"(reads={result['reads']}, writes={result['writes']}, errors={result['errors']})"
+        )
+    print(f"speedup: x{results[1]['ops_per_second'] / results[0]['ops_per_second']:.2f}")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="секунд на каждый профиль")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--read-ratio", type=float, default=0.8)
+    parser.add_argument("--json", help="куда сохранить результаты")
+    asyncio.run(main(parser.parse_args()))
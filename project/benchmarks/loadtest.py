@@ -0,0 +1,315 @@
+"""Нагрузочный тест API: параллельные сценарии против main.app в процессе или живого сервера.
+
+В процессе приложение получает временную SQLite и fakeredis (pip install -r requirements-dev.txt),
+поэтому ни Docker, ни Redis не нужны; лимиты /token и /register там отключены, пока не передан --rate-limit.
+С --url нагрузка идёт на запущенный сервер (uvicorn, docker compose) с его настройками.
+Запуск из каталога project:
+
+    python -m benchmarks.loadtest crud --concurrency 32 --duration 10
+    python -m benchmarks.loadtest crud --mix create=10,get=60,update=20,delete=5,list=5
+    python -m benchmarks.loadtest list --list-size 10000 --page-size 1000
+    python -m benchmarks.loadtest auth --users 20 --bcrypt-rounds 4
+    python -m benchmarks.loadtest crud --url http://localhost:8000 --json results/crud.json
+
+Результат - RPS и p50/p95/p99 по каждой операции; --json сохраняет их вместе с коммитом и параметрами,
+чтобы сравнивать прогоны между коммитами.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+import httpx
+
+DEFAULT_MIX = "create=20,get=50,update=20,delete=5,list=5"
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.client_errors: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, operation: str, seconds: float, status: int) -> None:
+        self.latencies[operation].append(seconds)
+        if status >= 500:
+            self.errors[operation] += 1
+        elif status >= 400:
+            self.client_errors[operation] += 1
+
+    def failed(self, operation: str) -> None:
+        self.errors[operation] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        def stats(latencies: List[float], errors: int, client_errors: int) -> dict:
+            latencies = sorted(latencies)
+            return {
+                "requests": len(latencies),
+                "errors": errors,
+                "client_errors": client_errors,
+                "rps": round(len(latencies) / elapsed, 1),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            }
+
+        operations = {
+            operation: stats(latencies, self.errors[operation], self.client_errors[operation])
+            for operation, latencies in sorted(self.latencies.items())
+        }
+        total = stats(
+            [value for latencies in self.latencies.values() for value in latencies],
+            sum(self.errors.values()),
+            sum(self.client_errors.values()),
+        )
+        return {"elapsed_seconds": round(elapsed, 2), "total": total, "operations": operations}
+
+
+async def timed(recorder: Recorder, operation: str, request) -> httpx.Response:
+    started = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError:
+        recorder.failed(operation)
+        raise
+    recorder.record(operation, time.perf_counter() - started, response.status_code)
+    return response
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = int(weight)
+    unknown = set(weights) - {"create", "get", "update", "delete", "list"}
+    if unknown:
+        raise SystemExit(f"Неизвестные операции в --mix: {', '.join(sorted(unknown))}")
+    return weights
+
+
+async def seed_tasks(client: httpx.AsyncClient, count: int) -> List[str]:
+    uuids = []
+    for start in range(0, count, 5000):
+        batch = [{"title": f"Task {i}", "description": "x" * 200} for i in range(start, min(count, start + 5000))]
+        response = await client.post("/api/tasks/bulk", json=batch)
+        response.raise_for_status()
+        uuids += [item["uuid"] for item in response.json()]
+    return uuids
+
+
+async def prepare_crud(client: httpx.AsyncClient, args) -> dict:
+    return {"weights": parse_mix(args.mix), "uuids": await seed_tasks(client, args.seed)}
+
+
+async def run_crud(client: httpx.AsyncClient, recorder: Recorder, args, state: dict, deadline: float) -> None:
+    uuids = state["uuids"]
+    operations, weights = list(state["weights"]), list(state["weights"].values())
+
+    async def worker(rnd: random.Random):
+        while time.perf_counter() < deadline:
+            operation = rnd.choices(operations, weights)[0]
+            try:
+                if operation == "create" or not uuids:
+                    response = await timed(recorder, "create", client.post("/api/tasks/", json={"title": "New task"}))
+                    if response.status_code == 200:
+                        uuids.append(response.json()["uuid"])
+                elif operation == "get":
+                    await timed(recorder, "get", client.get(f"/api/tasks/{rnd.choice(uuids)}"))
+                elif operation == "update":
+                    status = rnd.choice(["CREATED", "IN_PROGRESS", "COMPLETED"])
+                    await timed(recorder, "update", client.patch(f"/api/tasks/{rnd.choice(uuids)}", json={"status": status}))
+                elif operation == "delete":
+                    task_id = uuids.pop(rnd.randrange(len(uuids)))
+                    await timed(recorder, "delete", client.delete(f"/api/tasks/{task_id}"))
+                else:
+                    await timed(recorder, "list", client.get("/api/tasks/", params={"limit": args.page_size}))
+            except httpx.HTTPError:
+                pass
+
+    await asyncio.gather(*(worker(random.Random(seed)) for seed in range(args.concurrency)))
+
+
+async def prepare_list(client: httpx.AsyncClient, args) -> dict:
+    await seed_tasks(client, args.list_size)
+    params = {"limit": args.page_size}
+    if args.fields:
+        params["fields"] = args.fields
+    return {"params": params}
+
+
+async def run_list(client: httpx.AsyncClient, recorder: Recorder, args, state: dict, deadline: float) -> None:
+    async def worker():
+        # Полные проходы по списку страницами через X-Next-Cursor.
+        cursor = None
+        while time.perf_counter() < deadline:
+            params = dict(state["params"], cursor=cursor) if cursor else state["params"]
+            try:
+                response = await timed(recorder, "list_page", client.get("/api/tasks/", params=params))
+            except httpx.HTTPError:
+                cursor = None
+                continue
+            cursor = response.headers.get("X-Next-Cursor")
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+
+async def prepare_auth(client: httpx.AsyncClient, args) -> dict:
+    run_id = random.getrandbits(32)
+    users = [{"username": f"load-{run_id}-{i}", "password": "password"} for i in range(args.users)]
+    for user in users:
+        (await client.post("/api/users/register", json=user)).raise_for_status()
+    return {"users": users}
+
+
+async def run_auth(client: httpx.AsyncClient, recorder: Recorder, args, state: dict, deadline: float) -> None:
+    async def worker(rnd: random.Random):
+        while time.perf_counter() < deadline:
+            try:
+                response = await timed(recorder, "login", client.post("/api/JWT/token", json=rnd.choice(state["users"])))
+                if response.status_code != 200:
+                    continue
+                for _ in range(args.refreshes):
+                    # Cookie передаётся заголовком: общий cookie jar клиента смешал бы сессии воркеров.
+                    response = await timed(recorder, "refresh", client.post(
+                        "/api/JWT/refresh-token",
+                        headers={
+                            "Authorization": f"Bearer {response.json()['access_token']}",
+                            "Cookie": f"refresh_token={response.cookies['refresh_token']}",
+                        },
+                    ))
+                    if response.status_code != 200:
+                        break
+            except httpx.HTTPError:
+                pass
+
+    await asyncio.gather(*(worker(random.Random(seed)) for seed in range(args.concurrency)))
+
+
+SCENARIOS = {
+    "crud": (prepare_crud, run_crud),
+    "list": (prepare_list, run_list),
+    "auth": (prepare_auth, run_auth),
+}
+
+
+@asynccontextmanager
+async def in_process_client(args):
+    """main.app в этом же процессе: временная SQLite и fakeredis вместо Redis."""
+    directory = tempfile.mkdtemp(prefix="loadtest-")
+    os.environ["SQL_DATABASE"] = os.path.join(directory, "loadtest.db")
+    os.environ["DB_BACKEND"] = "sqlite"
+    os.environ.setdefault("BROKER_URL", "redis://localhost:6379/0")
+    os.environ.setdefault("SECRET_KEY", "loadtest")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("ACCESS_TOKEN_EXPIRE_DAYS", "1")
+    os.environ.setdefault("REFRESH_TOKEN_EXPIRE_DAYS", "2")
+    os.environ["RATE_LIMIT_ENABLED"] = "true" if args.rate_limit else "false"
+    if args.bcrypt_rounds is not None:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+
+    # Модули делают `from redis_client import redis`, поэтому подмена - до импорта приложения.
+    import fakeredis
+    import redis_client
+    redis_client.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    import main
+    from database import async_engine, read_engine
+    from Users.models import Base
+
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            yield client
+    await read_engine.dispose()
+    await async_engine.dispose()
+
+
+@asynccontextmanager
+async def remote_client(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        yield client
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_summary(summary: dict) -> None:
+    print(f"{'operation':<12}{'requests':>10}{'errors':>8}{'4xx':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = list(summary["operations"].items()) + [("total", summary["total"])]
+    for name, row in rows:
+        print(
+            f"{name:<12}{row['requests']:>10}{row['errors']:>8}{row['client_errors']:>6}{row['rps']:>10}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+        )
+
+
+async def main(args):
+    recorder = Recorder()
+    prepare, run = SCENARIOS[args.scenario]
+    async with (remote_client(args) if args.url else in_process_client(args)) as client:
+        # Подготовка данных (seed, регистрация пользователей) в замер не входит.
+        state = await prepare(client, args)
+        if args.warmup:
+            await run(client, Recorder(), args, state, time.perf_counter() + args.warmup)
+        started = time.perf_counter()
+        await run(client, recorder, args, state, started + args.duration)
+        elapsed = time.perf_counter() - started
+
+    summary = recorder.summary(elapsed)
+    print_summary(summary)
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as file:
+            json.dump({
+                "commit": git_commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "target": args.url or "in-process",
+                "scenario": args.scenario,
+                "parameters": {key: value for key, value in vars(args).items() if key not in ("json", "scenario", "url")},
+                **summary,
+            }, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--url", help="адрес запущенного сервера; по умолчанию main.app в этом процессе")
+    parser.add_argument("--concurrency", type=int, default=16, help="одновременных клиентов")
+    parser.add_argument("--duration", type=float, default=10, help="длительность замера, секунд")
+    parser.add_argument("--warmup", type=float, default=2, help="прогрев перед замером, секунд")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="crud: веса операций create/get/update/delete/list")
+    parser.add_argument("--seed", type=int, default=1000, help="crud: задач перед стартом")
+    parser.add_argument("--list-size", type=int, default=10000, help="list: задач в таблице")
+    parser.add_argument("--page-size", type=int, default=100, help="list и crud: limit страницы списка")
+    parser.add_argument("--fields", help="list: параметр ?fields=")
+    parser.add_argument("--users", type=int, default=10, help="auth: пользователей")
+    parser.add_argument("--refreshes", type=int, default=1, help="auth: refresh после каждого логина")
+    parser.add_argument("--bcrypt-rounds", type=int, help="в процессе: BCRYPT_ROUNDS вместо значения из настроек")
+    parser.add_argument("--rate-limit", action="store_true", help="в процессе: не отключать лимиты /token и /register")
+    parser.add_argument("--json", help="куда сохранить результаты")
+    asyncio.run(main(parser.parse_args()))
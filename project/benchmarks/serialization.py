@@ -0,0 +1,99 @@
+"""Процессорное время на ответ со списком задач: обычный путь через response_model и быстрый (TASK_FAST_JSON).
+
+Обычный путь повторяет то, что делает FastAPI: ORM-объекты, валидация List[TaskOut] с from_attributes,
+сериализация в python-объекты и json.dumps. Быстрый - кортежи из select(*TASK_COLUMNS) и orjson.
+
+Запуск из каталога project:
+
+    python -m benchmarks.serialization --sizes 1000 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import build_async_engine
+from Users.models import Base
+from Tasks.models import Task, TaskStatus
+from Tasks.schemas import TaskOut
+from Tasks.serialization import TASK_COLUMNS, dump_tasks
+
+TASK_LIST = TypeAdapter(List[TaskOut])
+
+
+def encode_default(tasks) -> bytes:
+    content = TASK_LIST.dump_python(TASK_LIST.validate_python(tasks, from_attributes=True), mode="json")
+    # Так кодирует fastapi.responses.JSONResponse.
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+async def measure(engine, size: int, fast: bool, repeat: int) -> dict:
+    stmt = (select(*TASK_COLUMNS) if fast else select(Task)).order_by(Task.uuid).limit(size)
+    timings = []
+    for _ in range(repeat):
+        async with engine.connect() as connection:
+            started = time.process_time()
+            if fast:
+                body = dump_tasks((await connection.execute(stmt)).all())
+            else:
+                # Отдельная ORM-сессия на запрос, как у SessionDep.
+                async with AsyncSession(bind=connection) as session:
+                    body = encode_default((await session.execute(stmt)).scalars().all())
+            timings.append(time.process_time() - started)
+    timings.sort()
+    return {
+        "size": size,
+        "mode": "fast" if fast else "default",
+        "cpu_ms_median": round(timings[len(timings) // 2] * 1000, 2),
+        "cpu_ms_min": round(timings[0] * 1000, 2),
+        "bytes": len(body),
+    }
+
+
+async def main(args):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        engine = build_async_engine(f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+            statuses = list(TaskStatus)
+            await connection.execute(insert(Task), [
+                {
+                    "uuid": str(uuid.uuid4()),
+                    "title": f"Task {i}",
+                    "description": "x" * args.description_length,
+                    "status": statuses[i % len(statuses)],
+                }
+                for i in range(max(args.sizes))
+            ])
+
+        for size in args.sizes:
+            default = await measure(engine, size, False, args.repeat)
+            fast = await measure(engine, size, True, args.repeat)
+            results += [default, fast]
+            print(
+                f"{size:>7} задач: default {default['cpu_ms_median']:>9} ms, "
+                f"fast {fast['cpu_ms_median']:>9} ms, x{default['cpu_ms_median'] / fast['cpu_ms_median']:.1f}"
+            )
+        await engine.dispose()
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--description-length", type=int, default=200)
+    parser.add_argument("--json", help="куда сохранить результаты")
+    asyncio.run(main(parser.parse_args()))
@@ -1,4 +1,7 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from sqlalchemy.engine import URL
 
 
 class Settings(BaseSettings):
@@ -9,12 +12,103 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_DAYS: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
 
+    DB_BACKEND: Literal['sqlite', 'postgresql'] = 'sqlite'
+    POSTGRES_HOST: str = 'localhost'
+    POSTGRES_PORT: int = 5432
+    POSTGRES_USER: str = 'postgres'
+    POSTGRES_PASSWORD: str = 'postgres'
+    POSTGRES_DB: str = 'tasks'
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 500
+    POSTGRES_COMMAND_TIMEOUT: float = 30
+
+    DB_ECHO: bool = False
+    DB_LOG_STATEMENTS: bool = False
+    DB_LOG_MIN_DURATION_MS: float = 0
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    DB_SERIALIZED_WRITER: bool = True
+    DB_WRITE_BATCH_SIZE: int = 64
+    SQLITE_JOURNAL_MODE: str = 'WAL'
+    SQLITE_SYNCHRONOUS: str = 'NORMAL'
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE: int = -65536
+
+    TASK_CACHE_ENABLED: bool = True
+    TASK_CACHE_TTL_SECONDS: int = 300
+    TASK_CACHE_MAX_ENTRIES: int = 10000
+    TASK_CACHE_TOMBSTONE_SECONDS: int = 30
+    TASK_FAST_JSON: bool = False
+
+    TASK_EVENTS_ENABLED: bool = True
+    TASK_EVENTS_STREAM_MAXLEN: int = 100000
+    TASK_EVENTS_CLIENT_QUEUE: int = 1000
+    TASK_EVENTS_HEARTBEAT_SECONDS: int = 15
+
+    TASK_STATS_RECONCILE_SECONDS: int = 300
+    TASK_COUNTERS_COMPACT_SECONDS: float = 10
+
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_SECONDS: int = 60
+    IDEMPOTENCY_WAIT_SECONDS: int = 10
+
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: Literal['thread', 'process'] = 'thread'
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    JWT_CACHE_ENABLED: bool = True
+    JWT_CACHE_MAX_ENTRIES: int = 10000
+    JWT_CACHE_TTL_SECONDS: int = 300
+    JWT_BLOOM_CAPACITY: int = 100000
+    JWT_BLOOM_ERROR_RATE: float = 0.01
+    JWT_BLOOM_REBUILD_SECONDS: int = 600
+
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+
+    METRICS_ENABLED: bool = True
+    EVENT_LOOP_LAG_INTERVAL_SECONDS: float = 0.5
+
+    PROFILER_ENABLED: bool = False
+    PROFILER_TOKEN: str = ''
+    PROFILER_INTERVAL_MS: int = 5
+    PROFILER_SLOW_REQUEST_MS: int = 0
+    PROFILER_HISTORY_SECONDS: int = 30
+    PROFILER_DUMP_DIR: str = 'profiles'
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_TOKEN_CAPACITY: int = 20
+    RATE_LIMIT_TOKEN_PER_SECOND: float = 1.0
+    RATE_LIMIT_REGISTER_CAPACITY: int = 10
+    RATE_LIMIT_REGISTER_PER_SECOND: float = 0.2
+    CONCURRENCY_LIMIT_TOKEN: int = 64
+    CONCURRENCY_LIMIT_REGISTER: int = 32
+
+    def _postgres_url(self, drivername: str) -> str:
+        return URL.create(
+            drivername,
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_HOST,
+            port=self.POSTGRES_PORT,
+            database=self.POSTGRES_DB,
+        ).render_as_string(hide_password=False)
+
     @property
     def DATABASE_URL_asyncpg(self):
+        if self.DB_BACKEND == 'postgresql':
+            return self._postgres_url('postgresql+asyncpg')
         return f"sqlite+aiosqlite:///{self.SQL_DATABASE}"
 
     @property
     def DATABASE_URL_psycopg(self):
+        if self.DB_BACKEND == 'postgresql':
+            return self._postgres_url('postgresql+psycopg')
         return f"sqlite+aiosqlite:///{self.SQL_DATABASE}"
 
     model_config = SettingsConfigDict(env_file='.env.dev')
@@ -1,20 +1,239 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import asyncio
+import logging
+import time
+from typing import Annotated, Awaitable, Callable, Optional, TypeVar
+
+from fastapi import Depends
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from config import settings
+from metrics import DB_STATEMENT_DURATION, statement_operation
+
+logger = logging.getLogger(__name__)
+sql_logger = logging.getLogger("database.sql")
+
+T = TypeVar("T")
+
+
+def sqlite_pragmas() -> dict:
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "foreign_keys": "ON",
+    }
+
+
+def engine_options(url: str, pool_size: int = None, max_overflow: int = None) -> dict:
+    options = {"echo": settings.DB_ECHO}
+    if make_url(url).drivername == "postgresql+asyncpg":
+        # asyncpg выполняет всё через серверные prepared statements; кэш держим по соединению.
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.POSTGRES_STATEMENT_CACHE_SIZE,
+            "command_timeout": settings.POSTGRES_COMMAND_TIMEOUT,
+        }
+    # Для :memory: SQLAlchemy использует StaticPool, параметры очереди к нему не применимы.
+    # Для файлов aiosqlite по умолчанию берёт NullPool, пул задаём явно.
+    if not is_memory_database(url):
+        options.update(
+            poolclass=AsyncAdaptedQueuePool if make_url(url).get_dialect().is_async else QueuePool,
+            pool_size=settings.DB_POOL_SIZE if pool_size is None else pool_size,
+            max_overflow=settings.DB_MAX_OVERFLOW if max_overflow is None else max_overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    return options
+
+
+def is_memory_database(url: str) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def apply_engine_profile(engine: Engine, pragmas: dict = None, begin: str = "BEGIN") -> None:
+    """Вешает на движок PRAGMA при подключении и, если включено, логирование запросов.
+
+    Для SQLite транзакции открываются явно (begin), а не драйвером sqlite3: иначе не работают
+    SAVEPOINT, на которых держится групповая запись WriteQueue.
+    """
+    if engine.dialect.name == "sqlite":
+        pragmas = sqlite_pragmas() if pragmas is None else pragmas
+
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def begin_transaction(conn):
+            conn.exec_driver_sql(begin)
+
+    if settings.DB_LOG_STATEMENTS or settings.METRICS_ENABLED:
+        @event.listens_for(engine, "before_cursor_execute")
+        def start_timer(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def log_statement(conn, cursor, statement, parameters, context, executemany):
+            duration = time.perf_counter() - conn.info["query_start_time"].pop()
+            if settings.METRICS_ENABLED:
+                DB_STATEMENT_DURATION.labels(statement_operation(statement)).observe(duration)
+            duration_ms = duration * 1000
+            if settings.DB_LOG_STATEMENTS and duration_ms >= settings.DB_LOG_MIN_DURATION_MS:
+                sql_logger.info(
+                    "sql %.2f ms",
+                    duration_ms,
+                    extra={
+                        "sql": statement,
+                        "duration_ms": round(duration_ms, 3),
+                        "executemany": executemany,
+                        "rowcount": cursor.rowcount,
+                    },
+                )
+
+
+def build_async_engine(url: str, pragmas: dict = None, begin: str = "BEGIN", **pool_options) -> AsyncEngine:
+    engine = create_async_engine(url=url, **engine_options(url, **pool_options))
+    apply_engine_profile(engine.sync_engine, pragmas, begin)
+    return engine
+
+
+class WriteQueue:
+    """Очередь записей к единственному соединению-писателю.
+
+    Задание - корутина, принимающая сессию и не вызывающая commit. Накопившиеся задания
+    выполняются в одной транзакции (каждое в своём SAVEPOINT, чтобы ошибка одного не
+    откатывала соседей) и фиксируются одним commit - один fsync на всю пачку.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker, max_batch: int):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, job: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        future = asyncio.get_running_loop().create_future()
+        self._ensure_worker().put_nowait((job, future))
+        return await future
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            await self._run_batch(batch)
+
+    async def _run_batch(self, batch: list) -> None:
+        outcomes = []
+        try:
+            async with self.session_factory() as session:
+                for job, future in batch:
+                    if future.done():
+                        continue
+                    try:
+                        async with session.begin_nested():
+                            outcomes.append((future, await job(session), None))
+                    except Exception as exc:
+                        outcomes.append((future, None, exc))
+                await session.commit()
+        except Exception as exc:
+            logger.exception("Write batch failed")
+            outcomes = [(future, None, exc) for _, future in batch]
+
+        for future, result, exc in outcomes:
+            if future.done():
+                continue
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
 
 sync_engine = create_engine(
     url=settings.DATABASE_URL_psycopg,
-    echo=True,
+    **engine_options(settings.DATABASE_URL_psycopg),
 )
+apply_engine_profile(sync_engine)
 
 
-async_engine = create_async_engine(
-    url=settings.DATABASE_URL_asyncpg,
-    echo=True,
+# Единственный писатель нужен только SQLite; Postgres сам разруливает параллельные записи.
+serialized_writer = settings.DB_SERIALIZED_WRITER and settings.DB_BACKEND == "sqlite"
+
+# Писатель: одно соединение, транзакция сразу берёт блокировку записи (BEGIN IMMEDIATE),
+# поэтому писатели не получают "database is locked" при попытке повысить блокировку.
+async_engine = build_async_engine(
+    settings.DATABASE_URL_asyncpg,
+    begin="BEGIN IMMEDIATE",
+    **({"pool_size": 1, "max_overflow": 0} if serialized_writer else {}),
 )
 
+# Читатели: отдельный пул, в WAL они не ждут писателя; у Postgres пул общий.
+# In-memory база существует только внутри одного соединения, а делить его с писателем нельзя:
+# сессии чтения вклинивались бы в открытую транзакцию пачки WriteQueue.
+if settings.DB_BACKEND != "sqlite":
+    read_engine = async_engine
+elif is_memory_database(settings.DATABASE_URL_asyncpg):
+    raise RuntimeError("In-memory SQLite is not supported: readers need their own connections, use a database file")
+else:
+    read_engine = build_async_engine(
+        settings.DATABASE_URL_asyncpg,
+        pragmas={**sqlite_pragmas(), "query_only": "ON"},
+    )
+
 
 session_factory = sessionmaker(sync_engine)
 async_session_factory = async_sessionmaker(async_engine)
+read_session_factory = async_sessionmaker(read_engine)
+
+write_queue = WriteQueue(async_session_factory, settings.DB_WRITE_BATCH_SIZE)
+
+
+async def get_session():
+    # Одна сессия чтения на запрос; все записи идут через run_write.
+    async with read_session_factory() as session:
+        yield session
+
+
+SessionDep = Annotated[AsyncSession, Depends(get_session)]
+
+
+async def run_write(job: Callable[[AsyncSession], Awaitable[T]]) -> T:
+    """Выполняет запись через очередь писателя или, если она выключена, в отдельной сессии."""
+    if serialized_writer:
+        return await write_queue.submit(job)
+    async with async_session_factory() as session:
+        result = await job(session)
+        await session.commit()
+        return result
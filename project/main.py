@@ -1,19 +1,91 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from Tasks.router import task_router
 from JWT.router import router as jwt_router
 from Users.router import router as users_router
+from Tasks.pagination import NEXT_CURSOR_HEADER
+from Tasks.conditional import ETAG_HEADER
+from Tasks.idempotency import REPLAYED_HEADER
+from Users.passwords import shutdown_executor, hasher_stats
+from database import write_queue
+from metrics import MetricsMiddleware, metrics_response, monitor_event_loop_lag, stats_collector
+from Tasks.cache import cache_stats
+from Tasks.events import event_stats
+from Users.cache import user_cache
+from JWT.token_cache import token_cache
+import ratelimit
+import profiler
+from config import settings
+from JWT.revocation import listen_for_revocations, rebuild_revoked_filter_periodically
+from Tasks.events import read_events
+from Tasks.counters import compact_counters_periodically, reconcile_status_counters_periodically
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background_tasks = [
+        asyncio.create_task(listen_for_revocations()),
+        asyncio.create_task(rebuild_revoked_filter_periodically()),
+        asyncio.create_task(reconcile_status_counters_periodically()),
+        asyncio.create_task(monitor_event_loop_lag()),
+    ]
+    # С выключенной лентой событий поток не читается: /stream отвечает 404.
+    if settings.TASK_EVENTS_ENABLED:
+        background_tasks.append(asyncio.create_task(read_events()))
+    # Приращения счётчиков копятся отдельными строками только в Postgres.
+    if settings.DB_BACKEND == "postgresql":
+        background_tasks.append(asyncio.create_task(compact_counters_periodically()))
+    # Захват медленных запросов держит сэмплер включённым постоянно, поэтому только по настройке.
+    if settings.PROFILER_ENABLED and settings.PROFILER_SLOW_REQUEST_MS > 0:
+        profiler.sampler.start_history()
+    yield
+    await profiler.sampler.shutdown()
+    for task in background_tasks:
+        task.cancel()
+    for task in background_tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+    await write_queue.close()
+    shutdown_executor()
+
+
+app = FastAPI(lifespan=lifespan)
 
-app = FastAPI()
+stats_collector.register(
+    "task_cache", cache_stats, counters=("hits", "misses", "errors", "evictions", "stale_writes_skipped")
+)
+stats_collector.register(
+    "task_events", event_stats, counters=("delivered", "dropped_subscribers", "publish_errors", "replay_errors")
+)
+stats_collector.register("password_hasher", hasher_stats, counters=("completed", "failed", "rejected"))
+stats_collector.register("write_queue", lambda: {"pending": write_queue.pending()})
+stats_collector.register("jwt_cache", lambda: {"entries": len(token_cache)})
+stats_collector.register("user_cache", lambda: {"entries": len(user_cache)})
+stats_collector.register("rate_limit_in_flight", lambda: dict(ratelimit.in_flight))
+
+app.add_middleware(MetricsMiddleware)
+if settings.PROFILER_ENABLED and settings.PROFILER_SLOW_REQUEST_MS > 0:
+    app.add_middleware(profiler.SlowRequestMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER, REPLAYED_HEADER],
 )
 
 app.include_router(task_router, prefix="/api/tasks", tags=["Менеджер задач"])
 app.include_router(jwt_router, prefix="/api/JWT", tags=["JWT"])
-app.include_router(users_router, prefix="/api/users", tags=["Пользователи"])
\ No newline at end of file
+app.include_router(users_router, prefix="/api/users", tags=["Пользователи"])
+if settings.PROFILER_ENABLED:
+    app.include_router(profiler.router, prefix="/api/profiler", tags=["Профилирование"])
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
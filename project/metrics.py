@@ -0,0 +1,117 @@
+import asyncio
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, List, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from starlette.responses import Response
+
+from config import settings
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP-запросы в обработке",
+    ["method"],
+)
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "Время выполнения SQL-запроса",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+REDIS_CALL_DURATION = Histogram(
+    "redis_call_duration_seconds",
+    "Время обращения к Redis",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Время bcrypt в пуле хеширования (без ожидания в очереди)",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Насколько позже запланированного просыпается event loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+
+def statement_operation(statement: str) -> str:
+    # Метка по первому слову (SELECT, INSERT, ...), а не по тексту запроса - иначе кардинальность не ограничена.
+    return statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+
+
+class StatsCollector(Collector):
+    """Отдаёт счётчики, которые модули и так ведут у себя (кэш задач, пул bcrypt, очередь записи).
+
+    Поля из counters только растут и экспортируются как counter (<prefix>_<name>_total), чтобы к ним
+    работал rate(); остальные - текущие значения, gauge.
+    """
+
+    def __init__(self):
+        self._sources: List[Tuple[str, Callable[[], Dict[str, float]], FrozenSet[str]]] = []
+
+    def register(self, prefix: str, source: Callable[[], Dict[str, float]], counters: Iterable[str] = ()) -> None:
+        self._sources.append((prefix, source, frozenset(counters)))
+
+    def collect(self):
+        for prefix, source, counters in self._sources:
+            for name, value in source().items():
+                family = CounterMetricFamily if name in counters else GaugeMetricFamily
+                yield family(f"{prefix}_{name}", f"{prefix}: {name}", value=value)
+
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: гистограмма длительности по шаблону маршрута (/api/tasks/{task_id}) и статусу."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        HTTP_REQUESTS_IN_PROGRESS.labels(method).inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Роутер дописывает найденный маршрут в тот же scope.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(method, route, str(status)).observe(time.perf_counter() - started)
+            HTTP_REQUESTS_IN_PROGRESS.labels(method).dec()
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+async def monitor_event_loop_lag() -> None:
+    """Фоновая задача: засыпает на EVENT_LOOP_LAG_INTERVAL_SECONDS и меряет, насколько проснулась позже."""
+    interval = settings.EVENT_LOOP_LAG_INTERVAL_SECONDS
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, time.perf_counter() - started - interval))
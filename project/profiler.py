@@ -0,0 +1,195 @@
+import asyncio
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def collapse_stack(frame, thread_name: str) -> str:
+    """Стек в формате collapsed (flamegraph.pl, speedscope): корень слева, кадры через ';'."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+
+def format_collapsed(samples: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class StackSampler:
+    """Сэмплирующий профайлер: отдельный поток раз в interval снимает стеки всех потоков.
+
+    Поток работает, только пока открыто окно профилирования или включён захват медленных
+    запросов; в остальное время профайлер ничего не стоит. Остановка ждёт поток в пуле потоков,
+    чтобы не блокировать event loop на тик сэмплера.
+    """
+
+    def __init__(self, interval: float, history_seconds: float):
+        self.interval = interval
+        # Один элемент на тик: время и стеки всех потоков.
+        self.history: Deque[Tuple[float, List[str]]] = deque(maxlen=max(1, int(history_seconds / interval)))
+        self.keep_history = False
+        self._window: Optional[Counter] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        # У каждого потока своё событие: новый поток может стартовать, пока старый ещё завершается.
+        self._stop = threading.Event()
+
+    @property
+    def window_open(self) -> bool:
+        return self._window is not None
+
+    def _ensure_running(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,), name="stack-sampler", daemon=True)
+            self._thread.start()
+
+    async def _stop_if_idle(self) -> None:
+        if self._thread is not None and not self.keep_history and self._window is None:
+            thread, self._thread = self._thread, None
+            self._stop.set()
+            await asyncio.get_running_loop().run_in_executor(None, thread.join)
+
+    def _run(self, stop: threading.Event) -> None:
+        own = threading.get_ident()
+        while not stop.wait(self.interval):
+            now = time.perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = [
+                collapse_stack(frame, names.get(ident, str(ident)))
+                for ident, frame in sys._current_frames().items()
+                if ident != own
+            ]
+            with self._lock:
+                if self.keep_history:
+                    self.history.append((now, stacks))
+                if self._window is not None:
+                    self._window.update(stacks)
+
+    def start_history(self) -> None:
+        self.keep_history = True
+        self._ensure_running()
+
+    def begin_window(self) -> None:
+        with self._lock:
+            self._window = Counter()
+        self._ensure_running()
+
+    async def end_window(self) -> Counter:
+        with self._lock:
+            window, self._window = self._window, None
+        await self._stop_if_idle()
+        return window
+
+    def samples_between(self, started: float, finished: float) -> Counter:
+        """Стеки, снятые между started и finished.
+
+        История упорядочена по времени, поэтому обход идёт с конца и останавливается на первом
+        тике раньше started: под блокировкой просматриваются только тики самого запроса,
+        а не вся история.
+        """
+        selected = []
+        with self._lock:
+            for at, stacks in reversed(self.history):
+                if at < started:
+                    break
+                if at <= finished:
+                    selected.append(stacks)
+        return Counter(stack for stacks in selected for stack in stacks)
+
+    async def shutdown(self) -> None:
+        self.keep_history = False
+        with self._lock:
+            self._window = None
+        await self._stop_if_idle()
+
+
+sampler = StackSampler(settings.PROFILER_INTERVAL_MS / 1000, settings.PROFILER_HISTORY_SECONDS)
+
+
+def dump_profile(name: str, samples: Counter) -> str:
+    os.makedirs(settings.PROFILER_DUMP_DIR, exist_ok=True)
+    path = os.path.join(settings.PROFILER_DUMP_DIR, f"{name}.collapsed")
+    with open(path, "w") as file:
+        file.write(format_collapsed(samples))
+    return path
+
+
+class SlowRequestMiddleware:
+    """Сохраняет стеки, снятые за время запроса дольше PROFILER_SLOW_REQUEST_MS.
+
+    Сэмплер видит весь процесс, поэтому в дамп попадает и то, что event loop в это время делал
+    для других запросов, - как правило, это и есть причина задержки.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            finished = time.perf_counter()
+            duration_ms = (finished - started) * 1000
+            if duration_ms >= settings.PROFILER_SLOW_REQUEST_MS:
+                # Подсчёт стеков и запись файла - в пуле потоков, а не в event loop.
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._capture, scope, started, finished, duration_ms
+                )
+
+    @staticmethod
+    def _capture(scope, started: float, finished: float, duration_ms: float) -> None:
+        samples = sampler.samples_between(started, finished)
+        if not samples:
+            return
+        route = getattr(scope.get("route"), "path", scope["path"])
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(duration_ms)}ms-{scope['method']}-{route.strip('/').replace('/', '_')}"
+        try:
+            path = dump_profile(name, samples)
+        except OSError:
+            logger.warning("Slow request profile was not saved", exc_info=True)
+            return
+        logger.warning("Slow request %s %s took %.0f ms, profile: %s", scope["method"], route, duration_ms, path)
+
+
+async def check_profiler_token(x_profiler_token: Optional[str] = Header(None)):
+    if not settings.PROFILER_TOKEN or not hmac.compare_digest(x_profiler_token or "", settings.PROFILER_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid profiler token")
+
+
+router = APIRouter(dependencies=[Depends(check_profiler_token)])
+
+
+@router.post("/start", summary="Начать окно профилирования")
+async def start_profiling():
+    if sampler.window_open:
+        raise HTTPException(status_code=409, detail="Profiling is already running")
+    sampler.begin_window()
+    return {"message": "Profiling started", "interval_ms": settings.PROFILER_INTERVAL_MS}
+
+
+@router.post("/stop", summary="Остановить профилирование и получить collapsed stacks", response_class=PlainTextResponse)
+async def stop_profiling():
+    if not sampler.window_open:
+        raise HTTPException(status_code=409, detail="Profiling is not running")
+    return PlainTextResponse(format_collapsed(await sampler.end_window()))
@@ -0,0 +1,126 @@
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict
+
+import jwt
+from fastapi import HTTPException, Request
+from redis.exceptions import RedisError
+
+from config import settings
+from redis_client import redis
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_KEY_PREFIX = "ratelimit:"
+
+# Token bucket в одном хеше: чтение, пополнение и списание атомарны, сколько бы воркеров ни было.
+# Время в миллисекундах, скорость - токенов в миллисекунду.
+# Дробные числа возвращаются строкой: Redis обрезает Lua number до целого.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate / 1000
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate / 1000) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+token_bucket = redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+
+@dataclass(frozen=True)
+class RouteLimit:
+    capacity: int
+    per_second: float
+    max_in_flight: int
+
+
+ROUTE_LIMITS: Dict[str, RouteLimit] = {
+    "token": RouteLimit(
+        settings.RATE_LIMIT_TOKEN_CAPACITY,
+        settings.RATE_LIMIT_TOKEN_PER_SECOND,
+        settings.CONCURRENCY_LIMIT_TOKEN,
+    ),
+    "register": RouteLimit(
+        settings.RATE_LIMIT_REGISTER_CAPACITY,
+        settings.RATE_LIMIT_REGISTER_PER_SECOND,
+        settings.CONCURRENCY_LIMIT_REGISTER,
+    ),
+}
+
+# Запросы в обработке по маршрутам, в пределах воркера.
+in_flight: Dict[str, int] = {name: 0 for name in ROUTE_LIMITS}
+
+
+def client_identity(request: Request) -> str:
+    """id пользователя из действующего access-токена, иначе IP клиента."""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except jwt.PyJWTError:
+            payload = {}
+        # create_access_token кладёт id пользователя в claim "id", а не в стандартный "sub".
+        if payload.get("id"):
+            return f"user:{payload['id']}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def _too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many requests",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+async def _take_token(route: str, limit: RouteLimit, identity: str) -> None:
+    try:
+        allowed, retry_after = await token_bucket(
+            keys=[f"{RATE_LIMIT_KEY_PREFIX}{route}:{identity}"],
+            args=[limit.capacity, limit.per_second / 1000, int(time.time() * 1000)],
+        )
+    except RedisError:
+        # Без Redis лимит по частоте не проверить; остаётся ограничение параллельности.
+        logger.warning("Rate limiter is unavailable", exc_info=True)
+        return
+    if not int(allowed):
+        raise _too_many_requests(float(retry_after))
+
+
+def limit_route(route: str):
+    """Зависимость FastAPI: token bucket на клиента и ограничение одновременных запросов на маршрут.
+
+    Параллельность проверяется первой и без обращения к Redis: при перегрузке запрос отклоняется
+    сразу, не дожидаясь очереди в пуле хеширования паролей.
+    """
+    async def dependency(request: Request):
+        if not settings.RATE_LIMIT_ENABLED:
+            yield
+            return
+        limit = ROUTE_LIMITS[route]
+        if in_flight[route] >= limit.max_in_flight:
+            raise _too_many_requests(1)
+        in_flight[route] += 1
+        try:
+            await _take_token(route, limit, client_identity(request))
+            yield
+        finally:
+            in_flight[route] -= 1
+
+    return dependency
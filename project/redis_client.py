@@ -0,0 +1,5 @@
+from redis.asyncio import from_url
+
+from config import settings
+
+redis = from_url(settings.BROKER_URL, decode_responses=True)